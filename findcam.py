@@ -1,5 +1,12 @@
+import os
+import sys
+
 import cv2
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "photo_project"))
+import config
+from sources import open_source
+
 for i in range(5):  # Check indexes 0-4
     cap = cv2.VideoCapture(i)
     if cap.isOpened():
@@ -7,3 +14,12 @@ for i in range(5):  # Check indexes 0-4
         cap.release()
     else:
         print(f"No camera found at index {i}")
+
+# The source the kiosk will actually use (config.CAMERA_SOURCE or PHOTO_SOURCE)
+source = open_source(config.CAMERA_SOURCE)
+ret, frame = source.read() if source.isOpened() else (False, None)
+if ret:
+    print(f"Configured source {config.CAMERA_SOURCE} works: {frame.shape[1]}x{frame.shape[0]}")
+else:
+    print(f"Configured source {config.CAMERA_SOURCE} gives no frames, change CAMERA_SOURCE in photo_project/config.py")
+source.release()
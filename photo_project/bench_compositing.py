@@ -0,0 +1,63 @@
+"""Border blend benchmark: old float64 apply_border() vs BorderCompositor on 900x1200.
+
+Run from photo_project/:  python bench_compositing.py [--runs 20]
+"""
+import argparse
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from compositing import BorderCompositor
+
+BORDER_IMAGES = ["frame1.png", "frame2.png", "frame3.png", "frame4.png"]
+SIZE = (900, 1200)
+
+
+def float_blend(frame, border):
+    """The blend apply_border() used to do."""
+    overlay = border[:, :, :3]
+    mask = border[:, :, 3] / 255.0
+    merged_image = (frame * (1 - mask[..., None]) + overlay * mask[..., None])
+    return merged_image.astype(np.uint8)
+
+
+def measure(fn, runs):
+    fn()  # warm up
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return sorted(times)[len(times) // 2] * 1000, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (SIZE[1], SIZE[0], 3), dtype=np.uint8)
+
+    print(f"{'border':<12}{'coverage':>9}{'float ms':>10}{'float MB':>10}{'int ms':>9}{'int MB':>9}{'max diff':>10}")
+    for path in BORDER_IMAGES:
+        border = cv2.resize(cv2.imread(path, cv2.IMREAD_UNCHANGED), SIZE)
+        compositor = BorderCompositor(border)
+
+        expected = float_blend(frame, border)
+        diff = int(np.abs(compositor.apply(frame).astype(np.int16) - expected).max())
+
+        float_ms, float_mb = measure(lambda: float_blend(frame, border), args.runs)
+        int_ms, int_mb = measure(lambda: compositor.apply(frame), args.runs)
+        print(f"{path:<12}{compositor.coverage:>9.0%}{float_ms:>10.1f}{float_mb:>10.1f}{int_ms:>9.1f}{int_mb:>9.1f}{diff:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Encode benchmark: encode time, output size and file write time per encoder setting.
+
+Uses the real composites in merge/ when there are any, otherwise builds
+900x1200 composites from the border PNGs. Files are written to
+--out-dir (default: a temp directory inside merge/) so the write time is
+measured on the same card the kiosk saves to.
+
+Run from photo_project/:  python bench_encoders.py [--spec jpeg:quality=85 ...] [--runs 5]
+"""
+import argparse
+import glob
+import os
+import shutil
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+import config
+from compositing import BorderCompositor
+from encoders import Encoder
+from writer import write_atomic
+
+MERGE_DIR = "merge"
+BORDER_IMAGES = ["frame1.png", "frame2.png", "frame3.png", "frame4.png"]
+SIZE = (900, 1200)
+
+DEFAULT_SPECS = [
+    "jpeg:quality=75",
+    "jpeg:quality=85",
+    "jpeg:quality=95",
+    "jpeg:quality=85,optimize",
+    "jpeg:quality=85,progressive,optimize",
+    "png:compression=0",
+    "png:compression=1",
+    "png:compression=3",
+    "png:compression=6",
+    "png:compression=9",
+    "webp:quality=75",
+    "webp:quality=90",
+    "webp:quality=101",
+]
+
+
+def load_composites(limit):
+    paths = sorted(glob.glob(os.path.join(MERGE_DIR, "merged_*")))[-limit:]
+    images = [cv2.imread(p) for p in paths]
+    images = [cv2.resize(img, SIZE) for img in images if img is not None]
+    if images:
+        return images, f"{len(images)} composites from {MERGE_DIR}/"
+
+    # No real sessions yet: a smooth photo-like frame with sensor noise under each border
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 1, SIZE[0])[None, :, None]
+    y = np.linspace(0, 1, SIZE[1])[:, None, None]
+    base = 255 * np.concatenate(np.broadcast_arrays(x * (1 - y), y, 0.5 + 0.5 * np.sin(6 * x + 4 * y)), axis=2)
+    frame = np.clip(base + rng.normal(0, 6, base.shape), 0, 255).astype(np.uint8)
+    images = []
+    for path in BORDER_IMAGES:
+        border = cv2.resize(cv2.imread(path, cv2.IMREAD_UNCHANGED), SIZE)
+        images.append(BorderCompositor(border).apply(frame))
+    return images, f"{len(images)} synthetic composites"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--spec", action="append", help="encoder spec to test, can be repeated (default: a standard sweep)")
+    parser.add_argument("--runs", type=int, default=3, help="encodes per image and spec")
+    parser.add_argument("--images", type=int, default=10, help="max composites to load from merge/")
+    parser.add_argument("--out-dir", help="where to write test files")
+    parser.add_argument("--fsync", default=config.WRITE_FSYNC, help="fsync policy for the write test")
+    args = parser.parse_args()
+
+    images, source = load_composites(args.images)
+    os.makedirs(MERGE_DIR, exist_ok=True)
+    out_dir = args.out_dir or tempfile.mkdtemp(prefix=".bench_", dir=MERGE_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+    print(f"{source}, writing to {out_dir} (fsync={args.fsync})\n")
+
+    print(f"{'spec':<38}{'encode ms':>10}{'size KB':>10}{'write ms':>10}{'total ms':>10}")
+    try:
+        for spec in args.spec or DEFAULT_SPECS:
+            encoder = Encoder.from_spec(spec)
+            encode_times, write_times, sizes = [], [], []
+            for i, image in enumerate(images):
+                for _ in range(args.runs):
+                    start = time.perf_counter()
+                    data = encoder.encode(image)
+                    encode_times.append(time.perf_counter() - start)
+
+                    path = os.path.join(out_dir, f"bench_{i}{encoder.ext}")
+                    start = time.perf_counter()
+                    write_atomic(path, data, args.fsync)
+                    write_times.append(time.perf_counter() - start)
+                    sizes.append(data.size)
+
+            encode_ms = np.median(encode_times) * 1000
+            write_ms = np.median(write_times) * 1000
+            print(f"{encoder.spec:<38}{encode_ms:>10.1f}{np.mean(sizes) / 1024:>10.0f}{write_ms:>10.1f}{encode_ms + write_ms:>10.1f}")
+    finally:
+        if not args.out_dir:
+            shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""Per-stage benchmark of the kiosk's frame pipeline for each profile, run headless.
+
+Each profile's live path (read, crop, resize, colour convert, display
+conversion), built from profiles.PROFILES the way inter.py builds it, is
+replayed on the same input at 720p, 1080p and 4K. Profiles that set the
+camera resolution (low_fps, and low_res through its capture mode) run at
+that resolution only. The capture path (border blend, encode with the
+profile's merge encoder) is timed once per shot. Tk itself is not
+involved, so the display stage stops at the PIL image a PhotoImage would be
+made from. Every profile/resolution runs in its own process, so peak RSS is
+per run.
+
+    python bench_pipeline.py                         synthetic input
+    python bench_pipeline.py --input session.avi     a recording (see sources.py --record)
+    python bench_pipeline.py --compare old.json      print p50 changes against an earlier run
+
+Results are written to bench_results.json (or --out).
+"""
+import argparse
+import datetime
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+import config
+import profiles
+from capture_modes import CaptureModeManager
+from compositing import BorderCompositor
+from display import CanvasDisplay
+from encoders import Encoder
+from geometry import FramePlanner
+from profiles import make_planner
+from sources import open_source
+
+# Results from before the profiles are keyed by the script the profile replaced
+OLD_NAMES = {"inter": "desktop", "optimized_for_pi": "pi", "xyissuesolved": "wide",
+             "less_resolution_inter": "low_res", "slow_optimized_lowfps": "low_fps"}
+RESOLUTIONS = {"720p": (1280, 720), "1080p": (1920, 1080), "4k": (3840, 2160)}
+STAGES = ["read", "crop", "resize", "color", "display", "blend", "encode"]
+BORDER = "frame1.png"
+
+
+class StageTimer:
+    """Collects per-frame totals for each stage, a stage may be entered several times per frame."""
+
+    def __init__(self):
+        self.samples = {name: [] for name in STAGES}
+        self._frame = {}
+        self._name = None
+        self._start = 0.0
+
+    def __call__(self, name):
+        self._name = name
+        return self
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self._frame[self._name] = self._frame.get(self._name, 0.0) + time.perf_counter() - self._start
+
+    def end_frame(self):
+        for name, value in self._frame.items():
+            self.samples[name].append(value)
+        self._frame = {}
+
+
+class _HeadlessCanvas:
+    """Just enough of a Tk canvas for CanvasDisplay.fit()."""
+
+    def __init__(self, width, height):
+        self.size = (width, height)
+
+    def winfo_width(self):
+        return self.size[0]
+
+    def winfo_height(self):
+        return self.size[1]
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def create_image(self, *args, **kwargs):
+        return 1
+
+
+def camera_size(profile):
+    """The camera resolution inter.py sets for profile, or None where it keeps the camera's own."""
+    if profile["capture_mode"] == "still_stream":
+        return config.STILL_RESOLUTION
+    if profile["capture_mode"] == "switch":
+        return config.PREVIEW_RESOLUTION
+    return profile["camera_size"]
+
+
+class ProfileRun:
+    """One profiles.PROFILES entry's per-frame and per-shot work, the way inter.py does it."""
+
+    def __init__(self, name, canvas):
+        self.name = name
+        self.profile = profiles.PROFILES[name]
+        self.fps = self.profile["fps"]
+        self.planner = make_planner(self.profile["crop"])
+        self.still_planner = FramePlanner(out_size=(900, 1200), buffers=0)
+        self.capture_modes = None
+        if self.profile["capture_mode"] is not None:
+            # Only preview() is used, which never touches the reader
+            self.capture_modes = CaptureModeManager(None, config.PREVIEW_RESOLUTION, config.STILL_RESOLUTION,
+                                                    strategy=self.profile["capture_mode"])
+        self.display = CanvasDisplay(_HeadlessCanvas(*canvas), interpolation=self.profile["interpolation"])
+        self.display.scale = self.profile["preview_scale"]
+        self._rgb = None
+        self._pil = None
+
+        border = cv2.imread(BORDER, cv2.IMREAD_UNCHANGED)
+        self.compositor = BorderCompositor(cv2.resize(border, (900, 1200)))
+        self.encoder = Encoder.from_spec(self.profile["merge_encoder"])
+
+    def frame(self, frame, t):
+        if self.capture_modes is not None:
+            with t("resize"):
+                frame = self.capture_modes.preview(frame)
+        with t("crop"):
+            self.planner.plan_for(frame)
+        with t("resize"):
+            frame = self.planner.process(frame)
+        # CanvasDisplay.show() up to the PhotoImage paste
+        with t("display"):
+            fitted = self.display.fit(frame)
+        with t("color"):
+            if self._rgb is None or self._rgb.shape != fitted.shape:
+                self._rgb = np.empty_like(fitted)
+            cv2.cvtColor(fitted, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        with t("display"):
+            if self._pil is None or self._pil.size != (fitted.shape[1], fitted.shape[0]):
+                self._pil = Image.fromarray(self._rgb)
+            else:
+                self._pil.frombytes(self._rgb)
+        return frame
+
+    def still(self, frame, t):
+        """The 900x1200 photo a countdown ends with, taken from the camera frame."""
+        with t("resize"):
+            return self.still_planner.process(frame)
+
+    def shot(self, still, t):
+        with t("blend"):
+            merged = self.compositor.apply(still)
+        with t("encode"):
+            self.encoder.encode(merged)
+
+
+def percentiles(samples):
+    if not samples:
+        return None
+    p50, p95, p99 = np.percentile(np.array(samples) * 1000, [50, 95, 99])
+    return {"p50": round(p50, 3), "p95": round(p95, 3), "p99": round(p99, 3), "n": len(samples)}
+
+
+def resolutions_for(name, chosen):
+    """Resolution labels to run profile name at: chosen ones, or the one it sets the camera to."""
+    size = camera_size(profiles.PROFILES[name])
+    if size is not None:
+        return [f"{size[0]}x{size[1]}"]
+    return chosen
+
+
+def run_one(profile_name, resolution, input_spec, frames, shots, canvas):
+    """Benchmark one profile at one resolution (a RESOLUTIONS key or WxH) in this process."""
+    width, height = RESOLUTIONS.get(resolution) or tuple(int(v) for v in resolution.split("x"))
+    source = open_source(input_spec or f"synthetic:{width}x{height}?fps=0")
+    if input_spec:
+        # Replay the recording at the resolution under test, as fast as possible
+        source.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        source.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        source.set(cv2.CAP_PROP_FPS, 0)
+
+    run = ProfileRun(profile_name, canvas)
+    t = StageTimer()
+    frame_times = []
+    last = None
+    for i in range(frames):
+        start = time.perf_counter()
+        with t("read"):
+            ret, frame = source.read()
+        if not ret:
+            break
+        last = frame
+        run.frame(frame, t)
+        t.end_frame()
+        if i >= 5:  # skip warm-up frames (plans, buffers, caches)
+            frame_times.append(time.perf_counter() - start)
+    source.release()
+
+    live = {name: percentiles(values) for name, values in t.samples.items()}
+
+    shot_timer = StageTimer()
+    for _ in range(shots):
+        run.shot(run.still(last, shot_timer), shot_timer)
+        shot_timer.end_frame()
+    capture = {name: percentiles(values) for name, values in shot_timer.samples.items()}
+
+    frame_ms = percentiles(frame_times)
+    return {
+        "profile": profile_name,
+        "resolution": resolution,
+        "input": input_spec or "synthetic",
+        "fps": run.fps,
+        "frame": frame_ms,
+        # The scheduler paces to the profile's fps and subtracts the work, so this is the best case on screen
+        "ui_fps_estimate": round(min(run.fps, 1000 / frame_ms["p50"]), 1) if frame_ms else None,
+        "live_stages": {k: v for k, v in live.items() if v},
+        "capture_stages": {k: v for k, v in capture.items() if v},
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results):
+    print(f"{'profile':<12}{'res':>10}" + "".join(f"{s:>9}" for s in STAGES) + f"{'frame p95':>11}{'ui fps':>8}{'RSS MB':>8}")
+    for r in results:
+        stages = dict(r["live_stages"])
+        stages.update({s: r["capture_stages"][s] for s in ("blend", "encode") if s in r["capture_stages"]})
+        cells = "".join(f"{stages[s]['p50']:>9.2f}" if s in stages else f"{'-':>9}" for s in STAGES)
+        print(f"{r['profile']:<12}{r['resolution']:>10}{cells}{r['frame']['p95']:>11.2f}{r['ui_fps_estimate']:>8}{r['peak_rss_mb']:>8}")
+    print("(stage columns are p50 ms, read..display per frame, blend/encode per shot)")
+
+
+def print_comparison(results, old_path):
+    with open(old_path) as f:
+        old = {(r.get("profile") or OLD_NAMES.get(r["variant"]), r["resolution"]): r for r in json.load(f)["results"]}
+    print(f"\nChange in p50 frame time against {old_path}:")
+    for r in results:
+        before = old.get((r["profile"], r["resolution"]))
+        if before is None:
+            continue
+        a, b = before["frame"]["p50"], r["frame"]["p50"]
+        print(f"{r['profile']:<12}{r['resolution']:>10}  {a:8.2f} -> {b:8.2f} ms  ({(b - a) / a:+.0%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", help="source spec or recording to replay (default: synthetic frames)")
+    parser.add_argument("--profile", action="append", choices=sorted(profiles.PROFILES), help="only these profiles")
+    parser.add_argument("--resolution", action="append", choices=sorted(RESOLUTIONS), help="only these resolutions")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--shots", type=int, default=10)
+    parser.add_argument("--canvas", default="1024x480", help="canvas size for the fit-to-canvas previews")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--worker", nargs=2, metavar=("PROFILE", "RES"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    input_spec = args.input
+    if input_spec and ":" not in input_spec:
+        input_spec = f"file:{input_spec}"
+    canvas = tuple(int(v) for v in args.canvas.split("x"))
+
+    if args.worker:
+        result = run_one(args.worker[0], args.worker[1], input_spec, args.frames, args.shots, canvas)
+        json.dump(result, sys.stdout)
+        return
+
+    results = []
+    for name in args.profile or list(profiles.PROFILES):
+        for resolution in resolutions_for(name, args.resolution or list(RESOLUTIONS)):
+            cmd = [sys.executable, __file__, "--worker", name, resolution,
+                   "--frames", str(args.frames), "--shots", str(args.shots), "--canvas", args.canvas]
+            if input_spec:
+                cmd += ["--input", input_spec]
+            print(f"Running {name} at {resolution}...", file=sys.stderr)
+            out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+            results.append(json.loads(out))
+
+    report = {
+        "commit": git_commit(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "machine": platform.platform(),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "frames": args.frames,
+        "canvas": args.canvas,
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print_table(results)
+    print(f"\nWrote {args.out}")
+    if args.compare:
+        print_comparison(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
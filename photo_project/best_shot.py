@@ -0,0 +1,122 @@
+"""Pick the best of a burst of frames: sharp, and neither too dark nor blown out.
+
+Every frame is shrunk to a small grayscale copy first (160x120 by default),
+so scoring costs about the same for any camera resolution. The copies are
+stacked and scored together with numpy:
+
+    sharpness   variance of the 4-neighbour Laplacian, motion blur and
+                focus misses lower it
+    exposure    how far the mean is from mid grey, plus the share of
+                clipped pixels at either end
+
+score = sharpness relative to the sharpest frame of the burst * (1 - exposure penalty)
+"""
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+def score_frames(frames, size=(160, 120)):
+    """Scores of BGR frames (any size, all the same), higher is better."""
+    small = np.empty((len(frames), size[1], size[0]), np.float32)
+    color = np.empty((size[1], size[0], 3), np.uint8)
+    gray = np.empty((size[1], size[0]), np.uint8)
+    for i, frame in enumerate(frames):
+        cv2.resize(frame, size, dst=color, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(color, cv2.COLOR_BGR2GRAY, dst=gray)
+        small[i] = gray
+
+    laplacian = (small[:, :-2, 1:-1] + small[:, 2:, 1:-1] + small[:, 1:-1, :-2] + small[:, 1:-1, 2:]
+                 - 4 * small[:, 1:-1, 1:-1])
+    sharpness = laplacian.reshape(len(frames), -1).var(axis=1)
+
+    flat = small.reshape(len(frames), -1)
+    mean_error = np.abs(flat.mean(axis=1) - 118.0) / 118.0
+    clipped = ((flat < 5) | (flat > 250)).mean(axis=1)
+    exposure_penalty = np.clip(0.5 * mean_error + clipped, 0.0, 1.0)
+
+    return sharpness / max(float(sharpness.max()), 1e-6) * (1.0 - exposure_penalty)
+
+
+class Burst:
+    """Frames around the end of the countdown, then the best of them.
+
+    While the countdown runs, offer() keeps the last `before` frames seen
+    in the final `window` seconds (or start() gets them from the camera
+    reader's ring). After the deadline, add() collects up to `after` more,
+    and done is True once it has them or `timeout` seconds have passed.
+    best() scores them all and returns the winner. Frames are kept by
+    reference with the time they were read: the camera reader never writes
+    into a frame it has handed out.
+    """
+
+    def __init__(self, before=2, after=3, window=0.5, timeout=0.5, size=(160, 120)):
+        self.window = window
+        self.after = after
+        self.timeout = timeout
+        self.size = size
+        self._before = deque(maxlen=before)
+        self._after = []
+        self._started = None
+
+        self.scores = None
+        self.best_index = None
+        self.best_time = None
+        self.score_time = 0.0
+
+    def reset(self):
+        self._before.clear()
+        self._after = []
+        self._started = None
+        self.scores = None
+        self.best_index = None
+        self.best_time = None
+
+    def offer(self, frame, frame_time, remaining):
+        """During the countdown: keep frame if remaining seconds to the deadline are within the window."""
+        if remaining <= self.window:
+            self._before.append((frame_time, frame))
+
+    def start(self, frame, frame_time, before=None):
+        """The deadline passed, frame is the one taken for it. before, [(frame time, frame)], replaces what offer() kept."""
+        if before is not None:
+            self._before.clear()
+            self._before.extend(before)
+        self._started = time.monotonic()
+        self._after = [(frame_time, frame)]
+
+    @property
+    def collecting(self):
+        return self._started is not None
+
+    @property
+    def done(self):
+        return self._started is not None and (len(self._after) >= self.after
+                                              or time.monotonic() - self._started >= self.timeout)
+
+    def add(self, frame, frame_time):
+        if len(self._after) < self.after:
+            self._after.append((frame_time, frame))
+
+    @property
+    def frames(self):
+        return [frame for _, frame in list(self._before) + self._after]
+
+    def best(self):
+        """(best frame, the other frames), sets scores, best_index, best_time and score_time."""
+        frames = self.frames
+        start = time.perf_counter()
+        if len(frames) > 1 and all(f.shape == frames[0].shape for f in frames):
+            self.scores = score_frames(frames, self.size)
+            self.best_index = int(np.argmax(self.scores))
+        else:
+            # Can't compare frames of different sizes (the camera switched mode), take the one at the deadline
+            self.scores, self.best_index = None, len(self._before) if self._after else len(frames) - 1
+        self.score_time = time.perf_counter() - start
+        self.best_time = (list(self._before) + self._after)[self.best_index][0]
+        best = frames[self.best_index]
+        others = [f for i, f in enumerate(frames) if i != self.best_index]
+        self._started = None
+        return best, others
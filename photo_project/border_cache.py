@@ -0,0 +1,206 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from threading import Thread, Lock
+
+import cv2
+from PIL import Image
+
+from border_ingest import sidecar_path
+from compositing import BorderCompositor
+
+# inotify event bits, see <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _fresh_sidecar(path, kind, stat):
+    """Path of rendition kind if border_ingest.py wrote it together with the main file (stat), else None."""
+    sidecar = sidecar_path(path, kind)
+    try:
+        return sidecar if os.stat(sidecar).st_mtime_ns == stat.st_mtime_ns else None
+    except OSError:
+        return None
+
+
+class BorderEntry:
+    """One border decoded and prepared at display size.
+
+    Renditions pre-rendered by border_ingest.py are used as they are, anything
+    missing or stale (e.g. a PNG copied over by hand) is rendered here.
+    """
+
+    def __init__(self, path, size, thumb_size, preview_size=None):
+        stat = os.stat(path)
+        border = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        if border is None:
+            raise ValueError(f"Could not decode {path}")
+
+        self.path = path
+        self.stamp = (stat.st_mtime_ns, stat.st_size)
+        self.border = border if (border.shape[1], border.shape[0]) == tuple(size) else cv2.resize(border, size)
+        self.compositor = BorderCompositor(self.border)
+
+        preview = _fresh_sidecar(path, "preview", stat) if preview_size is not None else None
+        self.preview = cv2.imread(preview, cv2.IMREAD_UNCHANGED) if preview else None
+        if self.preview is not None and (self.preview.shape[1], self.preview.shape[0]) != tuple(preview_size):
+            self.preview = None
+        if self.preview is None and preview_size is not None:
+            self.preview = cv2.resize(self.border, preview_size, interpolation=cv2.INTER_AREA)
+
+        # Same thumbnail the labels always had, built from the PNG with PIL unless it was pre-rendered
+        thumb = _fresh_sidecar(path, "thumb", stat)
+        with Image.open(thumb or path) as img:
+            self.thumbnail = img.copy() if img.size == tuple(thumb_size) else img.resize(thumb_size, Image.ANTIALIAS)
+
+    def source_for(self, size):
+        """Smallest rendition at least size, so the live preview scales the fewest pixels."""
+        if self.preview is not None and self.preview.shape[1] >= size[0] and self.preview.shape[0] >= size[1]:
+            return self.preview
+        return self.border
+
+
+class _Inotify:
+    """Minimal inotify binding through libc, raises OSError where it is not available."""
+
+    def __init__(self, directory):
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("libc not found")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify not supported")
+
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+
+    def read(self, timeout):
+        """Return names of files finished or moved into the directory, waiting up to timeout seconds."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        data = os.read(self.fd, 4096)
+        names = []
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            names.append(os.fsdecode(data[offset:offset + length].rstrip(b"\0")))
+            offset += length
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class BorderCache:
+    """Keeps every border decoded, resized and ready to blend, and reloads a border when its file changes.
+
+    Changes are picked up with inotify where available and by polling mtimes
+    otherwise. Reloading happens on the watcher thread, the kiosk collects the
+    indexes that changed with pop_changed() on the Tk thread and refreshes its
+    thumbnail labels from there.
+    """
+
+    def __init__(self, paths, size=(900, 1200), thumb_size=(100, 50), preview_size=None, poll_interval=1.0, settle_time=0.2):
+        self.paths = [os.path.abspath(p) for p in paths]
+        self.size = size
+        self.thumb_size = thumb_size
+        self.preview_size = preview_size
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time
+
+        self._lock = Lock()
+        self._changed = set()
+        self._running = False
+        self._thread = None
+        self.backend = None
+
+        self._entries = [BorderEntry(p, size, thumb_size, preview_size) for p in self.paths]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, index):
+        return self._entries[index]
+
+    def pop_changed(self):
+        """Return the indexes reloaded since the last call."""
+        with self._lock:
+            changed = sorted(self._changed)
+            self._changed.clear()
+        return changed
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = Thread(target=self._watch, name="border-cache", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _reload(self, index):
+        path = self.paths[index]
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        if (stat.st_mtime_ns, stat.st_size) == self._entries[index].stamp:
+            return
+
+        try:
+            entry = BorderEntry(path, self.size, self.thumb_size, self.preview_size)
+        except (OSError, ValueError, cv2.error) as e:
+            # Most likely still being written, the next event or poll retries
+            print(f"Error: Could not reload border {path}: {e}")
+            return
+
+        self._entries[index] = entry
+        with self._lock:
+            self._changed.add(index)
+        print(f"Border {index + 1} reloaded from {path}")
+
+    def _watch(self):
+        directories = {os.path.dirname(p) for p in self.paths}
+        watchers = []
+        try:
+            for d in directories:
+                watchers.append(_Inotify(d))
+            self.backend = "inotify"
+        except OSError:
+            for w in watchers:
+                w.close()
+            watchers = []
+            self.backend = "poll"
+
+        try:
+            while self._running:
+                if watchers:
+                    names = set()
+                    for w in watchers:
+                        names.update(w.read(self.poll_interval / len(watchers)))
+                    indexes = [i for i, p in enumerate(self.paths) if os.path.basename(p) in names]
+                    if indexes:
+                        time.sleep(self.settle_time)
+                else:
+                    time.sleep(self.poll_interval)
+                    indexes = range(len(self.paths))
+
+                for index in indexes:
+                    self._reload(index)
+        finally:
+            for w in watchers:
+                w.close()
@@ -0,0 +1,120 @@
+"""Turns an uploaded border into the files the kiosk loads.
+
+An upload can be any size, so it is checked and rendered once here rather
+than on every start of the kiosk:
+
+    frame4.png            RGBA at BORDER_SIZE (900x1200), what photos are blended with
+    frame4.preview.png    RGBA at config.BORDER_PREVIEW_SIZE, for the live preview
+    frame4.thumb.png      100x50 thumbnail for the border buttons
+
+All three get the same mtime and are renamed into place with the main file
+last, which is what the kiosk's BorderCache reacts to. A sidecar whose
+mtime doesn't match its main file is left over from an older border and is
+ignored (border_cache.BorderEntry renders that rendition itself).
+
+    python border_ingest.py upload.png frame2.png
+
+does the same for a border copied onto the kiosk by hand.
+"""
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+import config
+
+BORDER_SIZE = (900, 1200)
+THUMB_SIZE = (100, 50)
+
+
+def sidecar_path(path, kind):
+    """Path of the "preview" or "thumb" rendition of border file path."""
+    base, ext = os.path.splitext(path)
+    return f"{base}.{kind}{ext}"
+
+
+def check_border(path, min_side=None, max_side=None):
+    """Decode the file at path and return it as a BGRA array, or raise ValueError saying what is wrong with it."""
+    min_side = min_side or config.BORDER_MIN_SIDE
+    max_side = max_side or config.BORDER_MAX_SIDE
+    # The header alone says how big the decoded image would be, check before decoding it
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+    except (OSError, Image.DecompressionBombError):
+        raise ValueError("not an image that can be read")
+    if min(width, height) < min_side or max(width, height) > max_side:
+        raise ValueError(f"{width}x{height} is outside {min_side}..{max_side} pixels per side")
+
+    border = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+    if border is None:
+        raise ValueError("could not decode the image")
+    if border.ndim != 3 or border.shape[2] != 4:
+        raise ValueError("needs a transparent (RGBA) PNG, this one has no alpha channel")
+    if border.dtype != "uint8":
+        border = cv2.convertScaleAbs(border, alpha=255 / 65535)
+    return border
+
+
+def render(border, preview_size=None):
+    """Renditions of a BGRA border as {kind: array}, kind "" being the main file."""
+    preview_size = tuple(preview_size or config.BORDER_PREVIEW_SIZE)
+    main = cv2.resize(border, BORDER_SIZE, interpolation=cv2.INTER_AREA)
+    thumb = Image.fromarray(cv2.cvtColor(border, cv2.COLOR_BGRA2RGBA)).resize(THUMB_SIZE, Image.ANTIALIAS)
+    return {
+        "": main,
+        "preview": cv2.resize(main, preview_size, interpolation=cv2.INTER_AREA),
+        "thumb": cv2.cvtColor(np.asarray(thumb), cv2.COLOR_RGBA2BGRA),
+    }
+
+
+def install(renditions, dest):
+    """Write the renditions next to dest and swap them in, sidecars first and dest last."""
+    stamp = time.time_ns()
+    staged = []
+    try:
+        for kind, image in renditions.items():
+            path = sidecar_path(dest, kind) if kind else dest
+            ok, data = cv2.imencode(".png", image)
+            if not ok:
+                raise ValueError(f"could not encode the {kind or 'border'} rendition")
+            tmp = os.path.join(os.path.dirname(path) or ".", f".{os.path.basename(path)}.ingest")
+            staged.append((tmp, path))
+            with open(tmp, "wb") as f:
+                f.write(data.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            os.utime(tmp, ns=(stamp, stamp))
+        staged.sort(key=lambda item: item[1] == dest)
+        for tmp, path in staged:
+            os.replace(tmp, path)
+    finally:
+        for tmp, _ in staged:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+def ingest(path, dest, preview_size=None):
+    """Check the image at path, render it and install it as border file dest. Returns the original size."""
+    border = check_border(path)
+    install(render(border, preview_size), dest)
+    return border.shape[1], border.shape[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and pre-render a border for the kiosk")
+    parser.add_argument("image", help="the border as uploaded, a transparent PNG")
+    parser.add_argument("dest", help="border file to replace, e.g. frame2.png")
+    args = parser.parse_args()
+    try:
+        width, height = ingest(args.image, args.dest)
+    except ValueError as e:
+        parser.exit(1, f"Error: {args.image}: {e}\n")
+    print(f"Installed {args.image} ({width}x{height}) as {args.dest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import time
+from collections import deque
+from threading import Thread, Lock, Event
+
+import cv2
+
+
+class CameraReader:
+    """Reads the camera on its own thread and keeps the newest frame.
+
+    opener, if given, is called to open the camera again after
+    idle(release=True) closed it. With ring_bytes, the most recent frames
+    that fit in that many bytes are kept as well, with the time each was
+    read, so a photo can be taken from the frame closest to a deadline that
+    the UI only noticed later (frame_at()). Frames are kept by reference,
+    the camera allocates a new array for every read.
+    """
+
+    def __init__(self, camera, switch_timeout=3.0, opener=None, ring_bytes=0):
+        self.camera = camera
+        self.switch_timeout = switch_timeout
+        self.opener = opener
+        self.ring_bytes = ring_bytes
+        self._ring = deque()
+        self._ring_size = 0
+        self._lock = Lock()
+        self._frame = None
+        self._seq = 0
+        self._timestamp = 0.0
+        self._running = False
+        self._thread = None
+
+        # Resolution switches are applied by the capture thread between reads
+        self._requested_size = None
+        self._switch_target = None
+        self._switch_started = 0.0
+        self._switch_from = None
+        self.resolution = None
+        self.switch_latency = None
+        self.frames_discarded = 0
+        self.mode_changes = 0
+        self.mode_start_seq = 0
+        self._last_requested_size = None
+
+        # Idle mode: read one frame every _idle_interval seconds, or close the camera
+        self._idle_interval = None
+        self._release = False
+        self._released = False
+        self._wake = Event()
+        self.reopen_time = None
+
+        # Counters, frames_displayed is bumped by the UI through mark_displayed()
+        self.frames_captured = 0
+        self._last_read = None
+        self._read_interval = None
+        self.frames_displayed = 0
+        self.read_errors = 0
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = Thread(target=self._run, name="camera-reader", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def request_resolution(self, width, height):
+        """Switch the camera to width x height from the capture thread.
+
+        Frames still at the old size are discarded until the camera delivers the
+        new mode (or switch_timeout passes), so latest() never hands out a stale
+        frame from the old mode. Cameras that can't do the exact size are
+        accepted at whatever new size they pick. switch_latency holds how long
+        the last switch took.
+        """
+        with self._lock:
+            self._requested_size = (width, height)
+            self._last_requested_size = (width, height)
+
+    def idle(self, interval=None, release=False):
+        """Slow down to one read every interval seconds, or with release=True close the camera.
+
+        Releasing needs an opener to get the camera back. resume() returns to
+        full rate, reopening the camera first if it was released.
+        """
+        if release and self.opener is None:
+            raise ValueError("release=True needs a CameraReader opener")
+        with self._lock:
+            self._idle_interval = interval
+            self._release = release
+        self._wake.clear()
+
+    def resume(self):
+        with self._lock:
+            self._idle_interval = None
+            self._release = False
+            # The gaps read while idle say nothing about the camera's rate
+            self._last_read = self._read_interval = None
+        self._wake.set()
+
+    @property
+    def idling(self):
+        return self._release or self._idle_interval is not None
+
+    def _reopen(self):
+        """Open the camera again after a release, on the capture thread. Returns False to retry later."""
+        start = time.monotonic()
+        try:
+            camera = self.opener()
+        except (OSError, ValueError, cv2.error) as e:
+            print(f"Error: Could not reopen camera: {e}")
+            return False
+        if not camera.isOpened():
+            camera.release()
+            print("Error: Could not reopen camera.")
+            return False
+        if self._last_requested_size is not None:
+            camera.set(cv2.CAP_PROP_FRAME_WIDTH, self._last_requested_size[0])
+            camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self._last_requested_size[1])
+        self.camera = camera
+        self._released = False
+        self.reopen_time = time.monotonic() - start
+        return True
+
+    def _apply_requested_size(self):
+        with self._lock:
+            size, self._requested_size = self._requested_size, None
+        if size is None:
+            return
+        self._switch_started = time.monotonic()
+        self._switch_target = size
+        self._switch_from = self.resolution
+        self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, size[0])
+        self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, size[1])
+
+    def _check_switch(self, frame):
+        """Return True if the frame belongs to the requested mode."""
+        if self._switch_target is None:
+            return True
+        size = (frame.shape[1], frame.shape[0])
+        elapsed = time.monotonic() - self._switch_started
+        if size != self._switch_target and size == self._switch_from and elapsed < self.switch_timeout:
+            self.frames_discarded += 1
+            return False
+        if size != self._switch_target:
+            print(f"Camera gave {size[0]}x{size[1]} for {self._switch_target[0]}x{self._switch_target[1]}")
+        self.resolution = size
+        self.switch_latency = elapsed
+        self._switch_target = None
+        self.mode_start_seq = self._seq + 1
+        self.mode_changes += 1
+        return True
+
+    def _run(self):
+        while self._running:
+            if self._release:
+                if not self._released:
+                    self.camera.release()
+                    self._released = True
+                    with self._lock:
+                        self._ring.clear()
+                        self._ring_size = 0
+                self._wake.wait()
+                continue
+            if self._released and not self._reopen():
+                self._wake.wait(0.5)
+                continue
+
+            self._apply_requested_size()
+            ret, frame = self.camera.read()
+            if not ret:
+                self.read_errors += 1
+                if self.read_errors % 30 == 1:
+                    print("Error: Unable to read from camera.")
+                time.sleep(0.05)
+                continue
+            if not self._check_switch(frame):
+                continue
+            if self.resolution is None:
+                self.resolution = (frame.shape[1], frame.shape[0])
+
+            # Slot swap only, the array is never written to again by this thread
+            with self._lock:
+                self._frame = frame
+                self._seq += 1
+                self._timestamp = time.monotonic()
+                if self._last_read is not None and self._idle_interval is None:
+                    gap = self._timestamp - self._last_read
+                    self._read_interval = gap if self._read_interval is None else 0.9 * self._read_interval + 0.1 * gap
+                self._last_read = self._timestamp
+                self.frames_captured += 1
+                if self.ring_bytes:
+                    self._ring.append((self._timestamp, frame))
+                    self._ring_size += frame.nbytes
+                    while self._ring_size > self.ring_bytes and len(self._ring) > 1:
+                        self._ring_size -= self._ring.popleft()[1].nbytes
+
+            interval = self._idle_interval
+            if interval is not None:
+                self._wake.wait(interval)
+
+    def latest(self, after_seq=0):
+        """Return (seq, timestamp, frame) for the newest frame, or None if there is nothing newer than after_seq."""
+        with self._lock:
+            if self._frame is None or self._seq <= after_seq:
+                return None
+            return self._seq, self._timestamp, self._frame
+
+    def frame_at(self, when):
+        """(timestamp, frame) of the frame read closest to time.monotonic() value when, or None.
+
+        Without a ring that is simply the newest frame.
+        """
+        with self._lock:
+            if not self._ring:
+                return (self._timestamp, self._frame) if self._frame is not None else None
+            return min(self._ring, key=lambda item: abs(item[0] - when))
+
+    def frames_between(self, start, end):
+        """[(timestamp, frame)] from the ring read from start up to (not including) end."""
+        with self._lock:
+            return [item for item in self._ring if start <= item[0] < end]
+
+    @property
+    def capture_fps(self):
+        """Frames per second the camera actually delivers (smoothed), None until measured or while idle."""
+        interval = self._read_interval
+        if interval is None or self._idle_interval is not None or self._release:
+            return None
+        return 1.0 / max(interval, 1e-3)
+
+    @property
+    def ring_frames(self):
+        return len(self._ring)
+
+    def mark_displayed(self):
+        self.frames_displayed += 1
+
+    @property
+    def frames_dropped(self):
+        return max(0, self.frames_captured - self.frames_displayed)
+
+    def stats(self):
+        return {
+            "captured": self.frames_captured,
+            "displayed": self.frames_displayed,
+            "dropped": self.frames_dropped,
+            "read_errors": self.read_errors,
+            "discarded": self.frames_discarded,
+        }
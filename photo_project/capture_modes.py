@@ -0,0 +1,91 @@
+import time
+
+import cv2
+import numpy as np
+
+STRATEGIES = ("still_stream", "switch")
+
+
+class CaptureModeManager:
+    """Decides how the camera serves a cheap live preview and a full resolution still.
+
+    "still_stream" keeps the camera at still resolution all the time. The
+    preview is a downscale of each frame and a still is simply the newest
+    frame, so taking a photo never touches the camera settings.
+
+    "switch" streams at preview resolution and only switches to still
+    resolution for the shot. The switch runs on the CameraReader thread,
+    frames from the old mode are discarded, and the still is picked up by
+    polling poll_still() from the UI loop, so the UI never blocks on it.
+    """
+
+    def __init__(self, reader, preview_size, still_size, strategy="still_stream",
+                 interpolation=cv2.INTER_AREA, still_timeout=5.0):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"strategy must be one of {STRATEGIES}, not {strategy!r}")
+        self.reader = reader
+        self.preview_size = preview_size
+        self.still_size = still_size
+        self.strategy = strategy
+        self.interpolation = interpolation
+        self.still_timeout = still_timeout
+
+        self._preview_buffer = None
+        self._still_requested_at = None
+        self._mode_changes_at_request = 0
+
+        # Seconds from request_still() to having the still, last value and history
+        self.still_latency = None
+        self.still_latencies = []
+
+    def start(self):
+        size = self.still_size if self.strategy == "still_stream" else self.preview_size
+        self.reader.request_resolution(*size)
+
+    @property
+    def waiting(self):
+        return self._still_requested_at is not None
+
+    def preview(self, frame):
+        """Return the frame to show live, in still_stream mode scaled down into a reused buffer."""
+        if self.strategy != "still_stream":
+            return frame
+        height, width = frame.shape[:2]
+        scale = min(self.preview_size[0] / width, self.preview_size[1] / height)
+        if scale >= 1:
+            return frame
+        size = (max(int(width * scale), 1), max(int(height * scale), 1))
+        if self._preview_buffer is None or self._preview_buffer.shape[:2] != (size[1], size[0]):
+            self._preview_buffer = np.empty((size[1], size[0]) + frame.shape[2:], frame.dtype)
+        return cv2.resize(frame, size, dst=self._preview_buffer, interpolation=self.interpolation)
+
+    def request_still(self):
+        self._still_requested_at = time.monotonic()
+        self._mode_changes_at_request = self.reader.mode_changes
+        if self.strategy == "switch":
+            self.reader.request_resolution(*self.still_size)
+
+    def poll_still(self):
+        """Return the full resolution still once it is available, otherwise None."""
+        if self._still_requested_at is None:
+            return None
+
+        latest = self.reader.latest()
+        if latest is None:
+            return None
+
+        if self.strategy == "switch":
+            # Only a frame from after the switch to still resolution will do
+            switched = self.reader.mode_changes > self._mode_changes_at_request and latest[0] >= self.reader.mode_start_seq
+            if not switched and time.monotonic() - self._still_requested_at < self.still_timeout:
+                return None
+            if not switched:
+                print("Error: Camera did not switch to still resolution, using the preview frame")
+
+        self.still_latency = time.monotonic() - self._still_requested_at
+        self.still_latencies.append(self.still_latency)
+        self._still_requested_at = None
+
+        if self.strategy == "switch":
+            self.reader.request_resolution(*self.preview_size)
+        return latest[2]
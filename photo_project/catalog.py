@@ -0,0 +1,194 @@
+"""SQLite index of every photo the kiosk saved.
+
+One row per session (a press of the timer that ended in a photo) and one
+per file written for it: the capture, any merges and the other frames of
+the burst if they are kept. The ImageWriter thread
+adds the file row right after the file is renamed into place, and commits
+once its queue is empty, so a burst of saves is one transaction and the Tk
+thread never touches the database. WAL mode with synchronous=NORMAL keeps
+each commit to an append to the log.
+
+Session IDs have millisecond resolution, so two photos in the same second
+no longer get the same file name.
+
+    python catalog.py [stats | list [N] | rebuild]
+
+rebuild scans CAPTURE_DIR and MERGE_DIR and brings the catalog in line
+with what is on disk, e.g. after files were copied off the card or the
+database was lost.
+"""
+import argparse
+import datetime
+import hashlib
+import os
+import re
+import sqlite3
+import time
+
+import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    started REAL,
+    captured REAL,
+    shutter_delta REAL
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL REFERENCES sessions(id),
+    kind TEXT NOT NULL,
+    border INTEGER,
+    created REAL NOT NULL,
+    queue_seconds REAL,
+    write_seconds REAL,
+    size INTEGER NOT NULL,
+    sha1 TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_captured ON sessions(captured);
+CREATE INDEX IF NOT EXISTS files_session ON files(session_id);
+CREATE INDEX IF NOT EXISTS files_kind_created ON files(kind, created);
+CREATE INDEX IF NOT EXISTS files_sha1 ON files(sha1);
+"""
+
+# capture_<session>[_alt<n>].ext and merged_<session>[_b<border>].ext; older files only have a timestamp to the second
+FILE_NAME = re.compile(r"^(capture|merged)_(\d{4}-\d\d-\d\d_\d\d-\d\d-\d\d(?:_\d{3})?)(?:_b(\d+)|_alt(\d+))?\.\w+$")
+KINDS = {"capture": "capture", "merged": "merge"}
+
+_last_session_id = None
+
+
+def new_session_id():
+    """Time based ID to the millisecond, e.g. 2026-10-17_14-03-59_042, unique within this process."""
+    global _last_session_id
+    now = datetime.datetime.now()
+    session_id = now.strftime("%Y-%m-%d_%H-%M-%S_") + f"{now.microsecond // 1000:03d}"
+    while _last_session_id is not None and session_id <= _last_session_id:
+        # Same millisecond (or the clock went back), take the next one
+        now += datetime.timedelta(milliseconds=1)
+        session_id = now.strftime("%Y-%m-%d_%H-%M-%S_") + f"{now.microsecond // 1000:03d}"
+    _last_session_id = session_id
+    return session_id
+
+
+class Catalog:
+    """The database, used from one thread at a time (the ImageWriter's while the kiosk runs)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(sessions)")]
+        if "shutter_delta" not in columns:
+            # Catalogs from before the frame ring
+            self._db.execute("ALTER TABLE sessions ADD COLUMN shutter_delta REAL")
+        self.pending = 0
+
+    def close(self):
+        self.commit()
+        self._db.close()
+
+    def add(self, path, record, size, sha1, queue_seconds=None, write_seconds=None, created=None):
+        """Record a file written for a session, record being the dict the kiosk passed to ImageWriter.submit()."""
+        self._db.execute("INSERT OR IGNORE INTO sessions (id, started, captured, shutter_delta) VALUES (?, ?, ?, ?)",
+                         (record["session"], record.get("started"), record.get("captured"), record.get("shutter_delta")))
+        self._db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         (os.path.abspath(path), record["session"], record["kind"], record.get("border"), created or time.time(),
+                          queue_seconds, write_seconds, size, sha1))
+        self.pending += 1
+
+    def commit(self):
+        if self.pending:
+            self._db.commit()
+            self.pending = 0
+
+    # --- queries
+
+    def sessions(self, limit=50, offset=0):
+        """Newest sessions first, each as a dict with its files."""
+        rows = self._db.execute("SELECT id FROM sessions ORDER BY captured DESC, id DESC LIMIT ? OFFSET ?",
+                                (limit, offset)).fetchall()
+        return [self.session(row[0]) for row in rows]
+
+    def session(self, session_id):
+        row = self._db.execute("SELECT id, started, captured, shutter_delta FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        if row is None:
+            return None
+        files = self._db.execute("SELECT path, kind, border, created, queue_seconds, write_seconds, size, sha1 "
+                                 "FROM files WHERE session_id = ? ORDER BY created", (session_id,)).fetchall()
+        keys = ("path", "kind", "border", "created", "queue_seconds", "write_seconds", "size", "sha1")
+        return dict(id=row[0], started=row[1], captured=row[2], shutter_delta=row[3], files=[dict(zip(keys, f)) for f in files])
+
+    def find_hash(self, sha1):
+        return [row[0] for row in self._db.execute("SELECT path FROM files WHERE sha1 = ?", (sha1,))]
+
+    def stats(self):
+        sessions, delta = self._db.execute("SELECT COUNT(*), AVG(ABS(shutter_delta)) FROM sessions").fetchone()
+        kinds = {kind: dict(files=count, bytes=size or 0, avg_write_ms=round((write or 0) * 1000, 1))
+                 for kind, count, size, write in self._db.execute(
+                     "SELECT kind, COUNT(*), SUM(size), AVG(write_seconds) FROM files GROUP BY kind")}
+        return dict(sessions=sessions, avg_shutter_delta_ms=round((delta or 0) * 1000, 1), **kinds)
+
+    # --- rebuild
+
+    def rebuild(self, directories):
+        """Add files on disk that are missing (or changed) and drop rows of files that are gone. Returns (added, removed)."""
+        known = dict(self._db.execute("SELECT path, size FROM files"))
+        on_disk = set()
+        added = 0
+        for directory in directories:
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                match = FILE_NAME.match(entry.name)
+                if match is None or not entry.is_file():
+                    continue
+                path = os.path.abspath(entry.path)
+                on_disk.add(path)
+                stat = entry.stat()
+                if known.get(path) == stat.st_size:
+                    continue
+                kind, session_id, border, alternate = match.groups()
+                digest = hashlib.sha1()
+                with open(path, "rb") as f:
+                    for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                        digest.update(chunk)
+                record = dict(session=session_id, kind="alternate" if alternate else KINDS[kind],
+                              border=int(border) - 1 if border else None, captured=stat.st_mtime)
+                self.add(path, record, stat.st_size, digest.hexdigest(), created=stat.st_mtime)
+                added += 1
+        gone = [path for path in known if path not in on_disk]
+        self._db.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in gone])
+        self._db.execute("DELETE FROM sessions WHERE id NOT IN (SELECT session_id FROM files)")
+        self._db.commit()
+        self.pending = 0
+        return added, len(gone)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query or rebuild the photo catalog")
+    parser.add_argument("action", nargs="?", default="stats", choices=("stats", "list", "rebuild"))
+    parser.add_argument("count", nargs="?", type=int, default=20, help="sessions to list")
+    args = parser.parse_args()
+
+    catalog = Catalog(config.CATALOG_PATH)
+    if args.action == "rebuild":
+        start = time.monotonic()
+        added, removed = catalog.rebuild([config.CAPTURE_DIR, config.MERGE_DIR])
+        print(f"Added {added} files, removed {removed} missing ones in {time.monotonic() - start:.1f} s")
+    elif args.action == "list":
+        for session in catalog.sessions(args.count):
+            files = ", ".join(f"{f['kind']} {os.path.basename(f['path'])}" for f in session["files"])
+            print(f"{session['id']}  {files}")
+    else:
+        for key, value in catalog.stats().items():
+            print(f"{key}: {value}")
+    catalog.close()
+
+
+if __name__ == "__main__":
+    main()
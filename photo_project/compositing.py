@@ -0,0 +1,132 @@
+import cv2
+import numpy as np
+
+
+def _div255(acc, tmp):
+    """In-place floor(acc / 255) for uint16 values up to 255 * 255, tmp is scratch of the same shape."""
+    np.right_shift(acc, 8, out=tmp)
+    acc += tmp
+    acc += 1
+    acc >>= 8
+    return acc
+
+
+def _find_boxes(alpha, band, gap):
+    """Split the non-transparent part of an alpha mask into (y0, y1, x0, x1) boxes.
+
+    The mask is scanned in horizontal bands, each band yields one box per run of
+    columns that have any coverage, and boxes with the same columns in
+    consecutive bands are merged. A picture frame ends up as a handful of
+    rectangles along the edges instead of one box covering the whole photo.
+    Runs separated by fewer than `gap` transparent columns are joined, blending
+    a few extra pixels is cheaper than another pass over a tiny box.
+    """
+    height = alpha.shape[0]
+    boxes = []
+    open_boxes = {}
+    for y0 in range(0, height, band):
+        y1 = min(y0 + band, height)
+        cols = np.flatnonzero(alpha[y0:y1].any(axis=0))
+        runs = []
+        if cols.size:
+            splits = np.flatnonzero(np.diff(cols) > gap) + 1
+            runs = [(int(run[0]), int(run[-1]) + 1) for run in np.split(cols, splits)]
+
+        still_open = {}
+        for run in runs:
+            if run in open_boxes:
+                box = open_boxes.pop(run)
+                box[1] = y1
+            else:
+                box = [y0, y1, run[0], run[1]]
+            still_open[run] = box
+        boxes.extend(open_boxes.values())
+        open_boxes = still_open
+    boxes.extend(open_boxes.values())
+    return [tuple(box) for box in sorted(boxes)]
+
+
+class BorderCompositor:
+    """Blends one border onto frames of the border's size using integer math.
+
+    Everything that only depends on the border is done once here: the
+    non-transparent boxes, the premultiplied colour (overlay * alpha) and the
+    inverse alpha for each box. apply() then copies the frame and blends only
+    the boxes, giving floor((frame * (255 - a) + overlay * a) / 255), which is
+    what the old float64 blend computed, minus its rounding noise.
+    """
+
+    def __init__(self, border, band=16, gap=32):
+        self.size = (border.shape[1], border.shape[0])
+        self.regions = []
+        self.weighted = None
+
+        if border.ndim != 3 or border.shape[2] != 4:
+            # No alpha channel, keep the old fixed 70/30 mix
+            self.weighted = border
+            return
+
+        alpha = border[:, :, 3]
+        for y0, y1, x0, x1 in _find_boxes(alpha, band, gap):
+            a = alpha[y0:y1, x0:x1, None]
+            color = border[y0:y1, x0:x1, :3]
+            if (a == 255).all():
+                self.regions.append((y0, y1, x0, x1, None, np.ascontiguousarray(color)))
+                continue
+            a = a.astype(np.uint16)
+            premultiplied = color * a
+            inverse = 255 - a
+            self.regions.append((y0, y1, x0, x1, inverse, premultiplied))
+
+        scratch_size = max([r[5].size for r in self.regions], default=0)
+        self._scratch = np.empty((2, scratch_size), np.uint16)
+
+    @property
+    def coverage(self):
+        """Fraction of the frame that actually gets blended."""
+        area = sum((y1 - y0) * (x1 - x0) for y0, y1, x0, x1, _, _ in self.regions)
+        return area / float(self.size[0] * self.size[1])
+
+    def apply(self, frame, dst=None):
+        if (frame.shape[1], frame.shape[0]) != self.size:
+            raise ValueError(f"Frame is {frame.shape[1]}x{frame.shape[0]}, border is {self.size[0]}x{self.size[1]}")
+
+        if self.weighted is not None:
+            return cv2.addWeighted(frame, 0.7, self.weighted, 0.3, 0, dst=dst)
+
+        if dst is None:
+            dst = frame.copy()
+        elif dst is not frame:
+            np.copyto(dst, frame)
+
+        for y0, y1, x0, x1, inverse, premultiplied in self.regions:
+            if inverse is None:
+                # Fully opaque, the border pixels win outright
+                dst[y0:y1, x0:x1] = premultiplied
+                continue
+            acc, tmp = (s[:premultiplied.size].reshape(premultiplied.shape) for s in self._scratch)
+            np.multiply(frame[y0:y1, x0:x1], inverse, out=acc)
+            acc += premultiplied
+            dst[y0:y1, x0:x1] = _div255(acc, tmp)
+        return dst
+
+
+class ScaledCompositor:
+    """BorderCompositor for a border scaled to another size, e.g. the live preview on the canvas.
+
+    The scaled border and its blend data are rebuilt only when the border
+    array or the requested size changes, so live frames just call apply().
+    """
+
+    def __init__(self, interpolation=cv2.INTER_AREA):
+        self.interpolation = interpolation
+        self._border = None
+        self._compositor = None
+
+    def get(self, border, size):
+        size = tuple(size)
+        if border is not self._border or self._compositor is None or self._compositor.size != size:
+            scaled = cv2.resize(border, size, interpolation=self.interpolation)
+            self._compositor = BorderCompositor(scaled)
+            self._border = border
+        return self._compositor
@@ -0,0 +1,150 @@
+import os
+import tempfile
+
+import cv2
+
+# Preview scaling on the canvas. cv2.INTER_LINEAR is the cheapest, cv2.INTER_AREA looks closer
+# to the old Lanczos preview when shrinking a lot but costs several times more on the Pi
+DISPLAY_INTERPOLATION = cv2.INTER_LINEAR
+
+# Where photos are saved, relative to photo_project/: CAPTURE_DIR gets the plain captures and
+# MERGE_DIR the photos with a border
+CAPTURE_DIR = "captured_images"
+MERGE_DIR = "merge"
+# SQLite index of both (see catalog.py), "python catalog.py rebuild" recreates it from the files
+CATALOG_PATH = "catalog.db"
+
+# Background image writer: how many photos may wait in memory, and when to fsync
+# ("never", "file" = data before the rename, "always" = data and the directory entry)
+WRITE_QUEUE_SIZE = 8
+WRITE_FSYNC = "file"
+
+# Output formats, see encoders.Encoder for the spec syntax. python bench_encoders.py compares
+# encode time, file size and write time for a list of specs on this machine's card
+CAPTURE_ENCODER = "jpeg:quality=95"
+MERGE_ENCODER = "png:compression=1"
+PI_MERGE_ENCODER = "jpeg:quality=95"  # the pi profile (formerly optimized_for_pi.py) has always saved merges as JPEG
+
+# How the low_res profile gets full resolution stills, see capture_modes.py.
+# "still_stream" keeps the camera at still resolution and downscales the preview (no freeze
+# when taking a photo, more CPU for decoding), "switch" previews at low resolution and
+# switches the camera for each shot
+CAPTURE_MODE = "still_stream"
+PREVIEW_RESOLUTION = (480, 640)
+STILL_RESOLUTION = (1920, 1080)
+
+# Where frames come from, see sources.py: "camera:0" (change the index to match your camera),
+# "file:session.avi?fps=30" or "synthetic:1920x1080?fps=30". PHOTO_SOURCE overrides it, so
+# a build machine without a camera can run e.g. PHOTO_SOURCE=synthetic:1280x720 python inter.py
+CAMERA_SOURCE = os.environ.get("PHOTO_SOURCE", "camera:0")
+
+# Live metrics (see metrics.py). The kiosk rewrites this file once a second, server.py serves it
+# on /metrics in Prometheus format. /dev/shm is RAM, so this never wears the SD card
+METRICS_PATH = os.environ.get(
+    "PHOTO_METRICS", os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "photo_kiosk.prom"))
+METRICS_INTERVAL = 1.0
+
+# Key that shows/hides the fps and latency overlay in inter.py
+HUD_KEY = "<F2>"
+
+# Frame pacing (see scheduler.py). The live view aims for the profile's fps (TARGET_FPS unless the
+# profile says otherwise) and steps down through smaller previews, cheaper scaling and then fewer
+# frames when it keeps missing that, or when the CPU is over THERMAL_LIMIT degrees C / being
+# throttled. It steps back up when there is headroom
+TARGET_FPS = 30
+PI_TARGET_FPS = 10  # the pi profile
+ADAPTIVE_QUALITY = True
+THERMAL_LIMIT = 80.0
+
+# Sleep (see sleep_mode.py): after SLEEP_TIMEOUT seconds without a touch the live view stops.
+# "release" closes the camera until the next touch, "low_rate" keeps it open and reads one frame
+# every SLEEP_SAMPLE_INTERVAL seconds at SLEEP_RESOLUTION (None keeps the resolution, quickest
+# wake). WAKE_TIMEOUT bounds the "Waking up" screen
+SLEEP_TIMEOUT = 120
+SLEEP_CAMERA = "low_rate"
+SLEEP_SAMPLE_INTERVAL = 0.25
+SLEEP_RESOLUTION = (320, 240)
+WAKE_TIMEOUT = 5.0
+
+# Wake up when someone walks up to the booth (needs SLEEP_CAMERA = "low_rate"), see motion.py.
+# A pixel counts as changed above MOTION_THRESHOLD grey levels, and the kiosk wakes when more
+# than MOTION_MIN_AREA of the picture changes in two samples in a row
+MOTION_WAKE = True
+MOTION_THRESHOLD = 25
+MOTION_MIN_AREA = 0.02
+
+# Performance profile for inter.py (see profiles.py), --profile on the command line overrides it.
+# "auto" measures the device on first start and caches the result in CALIBRATION_CACHE
+PROFILE = os.environ.get("PHOTO_PROFILE", "auto")
+CALIBRATION_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "photo_kiosk", "calibration.json")
+
+# Printing (see print_spooler.py). Jobs wait in PRINT_SPOOL_DIR until the printer takes them, also
+# across restarts. PRINT_COMMAND gets {copies} and {path}; "drop:/some/dir" copies the file into a
+# directory instead, for testing without a printer or for a print server that watches a folder
+PRINT_SPOOL_DIR = "print_spool"
+PRINT_COMMAND = os.environ.get("PHOTO_PRINT_COMMAND", "lp -n {copies} {path}")
+PRINT_ENCODER = "jpeg:quality=95"
+PRINT_COPIES = 1
+PRINT_ATTEMPTS = 3
+PRINT_TIMEOUT = 60
+
+# Several photos per print sheet (see imposition.py): None prints nothing automatically, "2up"
+# (two photos on 4x6), "4up" (four on A4) or "strip" (four on a 2x6 strip) collects every saved
+# photo onto the sheet, which is printed once full or IMPOSITION_TIMEOUT seconds after its first
+# photo. Sheets are built at PRINT_DPI; an A4 sheet at 300 dpi takes 26 MB per buffer
+IMPOSITION_LAYOUT = None
+IMPOSITION_TIMEOUT = 60
+PRINT_DPI = 300
+
+# Border uploads through server.py (see border_ingest.py). Bigger uploads are refused while they
+# stream in, and the image has to be an RGBA PNG with sides between BORDER_MIN_SIDE and
+# BORDER_MAX_SIDE pixels. BORDER_PREVIEW_SIZE is pre-rendered for the live preview, set it to
+# about the preview size on the kiosk's screen
+UPLOAD_MAX_BYTES = 20 * 1024 * 1024
+BORDER_MIN_SIDE = 300
+BORDER_MAX_SIDE = 8000
+BORDER_PREVIEW_SIZE = (600, 800)
+
+# Gallery in server.py: thumbnails and web-sized copies are made on first view and kept in
+# GALLERY_CACHE_DIR (safe to delete, they are made again), GALLERY_PAGE_SIZE photos per page
+GALLERY_CACHE_DIR = "gallery_cache"
+GALLERY_PAGE_SIZE = 60
+
+# Live view in server.py's /stream: the kiosk shares its preview through shared memory named
+# FRAME_BUS_NAME (None turns it off, see frame_bus.py), scaled to fit STREAM_SIZE, and only
+# while someone watches. Viewers can pick a lower fps than STREAM_MAX_FPS with ?fps=
+FRAME_BUS_NAME = "photo_kiosk_preview"
+STREAM_SIZE = (480, 640)
+STREAM_MAX_FPS = 10
+STREAM_QUALITY = 70
+
+# Retention (see retention.py): oldest photos are deleted, raw captures before merges, while the
+# photo directories together are over RETENTION_MAX_BYTES or RETENTION_MAX_FILES, or the disk has
+# less than RETENTION_MIN_FREE_BYTES free; photos older than RETENTION_MAX_AGE_DAYS always go.
+# None turns a limit off. Photos from the last RETENTION_KEEP_SECONDS are never deleted.
+# GALLERY_CACHE_DIR copies of deleted photos are deleted with them.
+# The kiosk shows a warning below DISK_WARN_FREE_BYTES free and a red one below DISK_CRITICAL_FREE_BYTES
+RETENTION_MAX_BYTES = None
+RETENTION_MAX_FILES = None
+RETENTION_MAX_AGE_DAYS = None
+RETENTION_MIN_FREE_BYTES = 2 * 1024 ** 3
+RETENTION_KEEP_SECONDS = 3600
+RETENTION_INTERVAL = 60
+DISK_WARN_FREE_BYTES = 1024 ** 3
+DISK_CRITICAL_FREE_BYTES = 300 * 1024 ** 2
+
+# Burst capture (see best_shot.py): the last BURST_BEFORE frames of the final BURST_WINDOW seconds
+# of the countdown and up to BURST_AFTER frames after it are scored for sharpness and exposure, and
+# the best one becomes the photo. BURST_AFTER = 0 takes the single frame at the deadline as before.
+# Not used with CAPTURE_MODE, which takes one full resolution still. BURST_KEEP_OTHERS also saves
+# the other frames as capture_<session>_alt<n> for picking a retake by hand
+BURST_BEFORE = 2
+BURST_AFTER = 3
+BURST_WINDOW = 0.5
+BURST_KEEP_OTHERS = False
+
+# Zero shutter lag: the camera reader keeps the most recent frames that fit in ZSL_RING_BYTES, and
+# the photo is the one read closest to the end of the countdown instead of whichever frame the
+# display loop happens to be on (up to a slow loop later on the Pi). About 6 MB per 1080p frame,
+# 0 keeps only the newest frame
+ZSL_RING_BYTES = 64 * 1024 ** 2
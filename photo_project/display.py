@@ -0,0 +1,91 @@
+import time
+import tkinter as tk
+
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+
+class CanvasDisplay:
+    """Draws BGR frames on a Tk canvas through one PhotoImage and one canvas item.
+
+    The canvas size comes from <Configure> events instead of winfo_* calls,
+    frames are scaled in OpenCV before the colour conversion, and the
+    PhotoImage is only recreated when the fitted size changes. Otherwise every
+    buffer along the way is reused and the PhotoImage is updated in place.
+    """
+
+    def __init__(self, canvas, interpolation=cv2.INTER_LINEAR):
+        self.canvas = canvas
+        self.interpolation = interpolation
+        # Share of the canvas the frame may use, lowered by the scheduler when the Pi can't keep up
+        self.scale = 1.0
+        self.canvas_size = (max(canvas.winfo_width(), 1), max(canvas.winfo_height(), 1))
+        canvas.bind("<Configure>", self._on_configure, add="+")
+
+        self._item = canvas.create_image(0, 0, anchor=tk.NW)
+        self._photo = None
+        self._pil = None
+        self._resized = None
+        self._rgb = None
+        self._position = None
+
+        # Cost of the last show() call and a running average, in seconds
+        self.blit_time = 0.0
+        self.blit_avg = 0.0
+        self.frames_shown = 0
+
+    def _on_configure(self, event):
+        self.canvas_size = (max(event.width, 1), max(event.height, 1))
+
+    def fit_size(self, frame):
+        """Largest size with the frame's aspect ratio that fits the canvas."""
+        canvas_width, canvas_height = (max(int(side * self.scale), 1) for side in self.canvas_size)
+        img_ratio = frame.shape[1] / frame.shape[0]
+        if canvas_width / canvas_height > img_ratio:
+            new_height = canvas_height
+            new_width = int(new_height * img_ratio)
+        else:
+            new_width = canvas_width
+            new_height = int(new_width / img_ratio)
+        return max(new_width, 1), max(new_height, 1)
+
+    def fit(self, frame):
+        """Return the frame scaled to fit the canvas, in a reused buffer.
+
+        The result stays valid until the next fit() or show() call and can be
+        drawn on in place (e.g. to blend a border) before passing it to show().
+        """
+        width, height = self.fit_size(frame)
+        if (frame.shape[1], frame.shape[0]) == (width, height):
+            return frame
+        if self._resized is None or self._resized.shape[:2] != (height, width):
+            self._resized = np.empty((height, width, 3), np.uint8)
+        return cv2.resize(frame, (width, height), dst=self._resized, interpolation=self.interpolation)
+
+    def show(self, frame):
+        start = time.perf_counter()
+
+        frame = self.fit(frame)
+        height, width = frame.shape[:2]
+        if self._rgb is None or self._rgb.shape[:2] != (height, width):
+            self._rgb = np.empty((height, width, 3), np.uint8)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb)
+
+        if self._photo is None or self._pil.size != (width, height):
+            self._pil = Image.fromarray(self._rgb)
+            self._photo = ImageTk.PhotoImage(image=self._pil)
+            self.canvas.itemconfig(self._item, image=self._photo)
+        else:
+            self._pil.frombytes(self._rgb)
+            self._photo.paste(self._pil)
+
+        canvas_width, canvas_height = self.canvas_size
+        position = ((canvas_width - width) // 2, (canvas_height - height) // 2)
+        if position != self._position:
+            self.canvas.coords(self._item, *position)
+            self._position = position
+
+        self.blit_time = time.perf_counter() - start
+        self.blit_avg = self.blit_time if not self.frames_shown else 0.95 * self.blit_avg + 0.05 * self.blit_time
+        self.frames_shown += 1
@@ -0,0 +1,61 @@
+import cv2
+
+
+class Encoder:
+    """Output format and its OpenCV encode parameters.
+
+    Built from a spec string such as "jpeg:quality=90,progressive,optimize",
+    "png:compression=3" or "webp:quality=85" (a WebP quality above 100 means
+    lossless).
+    """
+
+    FORMATS = {"jpeg": ".jpg", "png": ".png", "webp": ".webp"}
+    DEFAULTS = {"jpeg": {"quality": 95}, "png": {"compression": 1}, "webp": {"quality": 90}}
+
+    def __init__(self, fmt, **options):
+        fmt = "jpeg" if fmt == "jpg" else fmt
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unknown format {fmt!r}, expected one of {', '.join(self.FORMATS)}")
+        self.format = fmt
+        self.options = dict(self.DEFAULTS[fmt], **options)
+        self.params = self._params()
+
+    @classmethod
+    def from_spec(cls, spec):
+        fmt, _, rest = spec.partition(":")
+        options = {}
+        for item in filter(None, rest.split(",")):
+            key, sep, value = item.partition("=")
+            options[key.strip()] = int(value) if sep else True
+        return cls(fmt.strip().lower(), **options)
+
+    def _params(self):
+        opts = self.options
+        if self.format == "jpeg":
+            params = [cv2.IMWRITE_JPEG_QUALITY, int(opts["quality"])]
+            if opts.get("progressive"):
+                params += [cv2.IMWRITE_JPEG_PROGRESSIVE, 1]
+            if opts.get("optimize"):
+                params += [cv2.IMWRITE_JPEG_OPTIMIZE, 1]
+            return params
+        if self.format == "png":
+            return [cv2.IMWRITE_PNG_COMPRESSION, int(opts["compression"])]
+        return [cv2.IMWRITE_WEBP_QUALITY, int(opts["quality"])]
+
+    @property
+    def ext(self):
+        return self.FORMATS[self.format]
+
+    @property
+    def spec(self):
+        options = ",".join(k if v is True else f"{k}={v}" for k, v in sorted(self.options.items()))
+        return f"{self.format}:{options}"
+
+    def encode(self, image):
+        ok, data = cv2.imencode(self.ext, image, self.params)
+        if not ok:
+            raise ValueError(f"Could not encode image as {self.spec}")
+        return data
+
+    def __repr__(self):
+        return f"Encoder({self.spec!r})"
@@ -0,0 +1,137 @@
+"""Latest preview frames in shared memory, for server.py's /stream.
+
+Only the kiosk may open the camera, so it publishes what it shows into a
+multiprocessing.shared_memory block instead: a small header and a ring of
+fixed size slots, each with a sequence number, the frame time and the
+frame's size. The frame is scaled straight into its slot, there is no other
+copy on the kiosk side.
+
+Viewers write a heartbeat into the header. The kiosk publishes only while a
+heartbeat is less than VIEWER_TIMEOUT seconds old and at most max_fps times
+a second, so with nobody watching the cost is reading one number per frame.
+
+Readers check the slot's sequence number before and after copying the
+frame out; if the kiosk came round the ring and overwrote the slot in
+between, the copy is thrown away.
+"""
+import time
+from multiprocessing import shared_memory, resource_tracker
+
+import cv2
+import numpy as np
+
+MAGIC = 0x50484f544f425553  # "PHOTOBUS"
+VIEWER_TIMEOUT = 2.0
+
+# Header words: uint64 except HEARTBEAT, which is a float64 time.monotonic()
+MAGIC_WORD, SLOTS, WIDTH, HEIGHT, WRITE_SEQ, HEARTBEAT = range(6)
+HEADER_BYTES = 64
+# Slot words before the pixels: uint64 seq, width, height, float64 frame time
+SLOT_SEQ, SLOT_WIDTH, SLOT_HEIGHT, SLOT_TIME = range(4)
+SLOT_HEADER_BYTES = 32
+
+
+class FrameBus:
+    """One end of the shared preview ring, see the module docstring.
+
+    The kiosk creates it (create=True, size and slots set the layout),
+    server.py attaches to it by name and gets the layout from the header.
+    Attaching raises FileNotFoundError when the kiosk isn't running.
+    """
+
+    def __init__(self, name, create=False, size=(480, 640), slots=3, max_fps=10):
+        self.name = name
+        self.max_fps = max_fps
+        self._last_publish = 0.0
+
+        if create:
+            frame_bytes = size[0] * size[1] * 3
+            total = HEADER_BYTES + slots * (SLOT_HEADER_BYTES + frame_bytes)
+            try:
+                self._shm = shared_memory.SharedMemory(name, create=True, size=total)
+            except FileExistsError:
+                # Left over from a kiosk that didn't exit cleanly
+                stale = shared_memory.SharedMemory(name)
+                stale.close()
+                stale.unlink()
+                self._shm = shared_memory.SharedMemory(name, create=True, size=total)
+        else:
+            self._shm = shared_memory.SharedMemory(name)
+            # Only the kiosk owns the block, don't let this process's tracker remove it at exit
+            resource_tracker.unregister(self._shm._name, "shared_memory")
+        self.owner = create
+
+        buf = self._shm.buf
+        self._header = np.ndarray((HEADER_BYTES // 8,), np.uint64, buf, 0)
+        self._header_f = np.ndarray((HEADER_BYTES // 8,), np.float64, buf, 0)
+        if create:
+            self._header[:] = 0
+            self._header[[SLOTS, WIDTH, HEIGHT]] = (slots, size[0], size[1])
+            self._header[MAGIC_WORD] = MAGIC
+        elif self._header[MAGIC_WORD] != MAGIC:
+            self.close()
+            raise ValueError(f"Shared memory {name} is not a frame bus")
+
+        self.slots = int(self._header[SLOTS])
+        self.size = (int(self._header[WIDTH]), int(self._header[HEIGHT]))
+        frame_bytes = self.size[0] * self.size[1] * 3
+        self._slot_headers = []
+        self._slot_frames = []
+        for i in range(self.slots):
+            offset = HEADER_BYTES + i * (SLOT_HEADER_BYTES + frame_bytes)
+            self._slot_headers.append((np.ndarray((4,), np.uint64, buf, offset),
+                                       np.ndarray((4,), np.float64, buf, offset)))
+            self._slot_frames.append(np.ndarray((self.size[1], self.size[0], 3), np.uint8, buf, offset + SLOT_HEADER_BYTES))
+
+    def close(self):
+        """Detach, and remove the block if this end created it."""
+        self._header = self._header_f = None
+        self._slot_headers = self._slot_frames = []
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+    # --- kiosk side
+
+    def wanted(self):
+        """True when a viewer is connected and the next frame is due."""
+        now = time.monotonic()
+        return now - self._header_f[HEARTBEAT] < VIEWER_TIMEOUT and now - self._last_publish >= 1.0 / self.max_fps
+
+    def publish(self, frame, frame_time=None):
+        """Scale a BGR frame into the next slot, keeping its aspect ratio within the bus size."""
+        self._last_publish = time.monotonic()
+        scale = min(self.size[0] / frame.shape[1], self.size[1] / frame.shape[0])
+        width, height = max(int(frame.shape[1] * scale), 1), max(int(frame.shape[0] * scale), 1)
+
+        seq = int(self._header[WRITE_SEQ]) + 1
+        words, times = self._slot_headers[seq % self.slots]
+        words[SLOT_SEQ] = 0  # being written
+        # Linear rather than area: several times cheaper on the Tk thread, and good enough for a JPEG stream
+        cv2.resize(frame, (width, height), dst=self._slot_frames[seq % self.slots][:height, :width],
+                   interpolation=cv2.INTER_LINEAR)
+        words[SLOT_WIDTH], words[SLOT_HEIGHT] = width, height
+        times[SLOT_TIME] = frame_time if frame_time is not None else self._last_publish
+        words[SLOT_SEQ] = seq
+        self._header[WRITE_SEQ] = seq
+
+    # --- viewer side
+
+    def heartbeat(self):
+        """Tell the kiosk someone is watching, call at least every VIEWER_TIMEOUT seconds."""
+        self._header_f[HEARTBEAT] = time.monotonic()
+
+    def latest(self, last_seq=0):
+        """(seq, frame time, copy of the frame) of the newest frame after last_seq, or None."""
+        seq = int(self._header[WRITE_SEQ])
+        if seq == 0 or seq == last_seq:
+            return None
+        words, times = self._slot_headers[seq % self.slots]
+        if int(words[SLOT_SEQ]) != seq:
+            return None
+        width, height, frame_time = int(words[SLOT_WIDTH]), int(words[SLOT_HEIGHT]), float(times[SLOT_TIME])
+        frame = self._slot_frames[seq % self.slots][:height, :width].copy()
+        if int(words[SLOT_SEQ]) != seq:
+            # Overwritten while copying
+            return None
+        return seq, frame_time, frame
@@ -0,0 +1,124 @@
+"""Photos on disk as albums for server.py: pages of file names and cached smaller copies.
+
+Listing an album is one scandir (no stat per file), cached until the
+directory's mtime changes, and pages are slices of it, newest first; the
+file names start with their timestamp, so name order is time order.
+
+Smaller copies ("thumb", "web") are made on first request and kept in
+cache_dir under the SHA-1 of the original's content, which is also the
+ETag. The hash of a file is remembered for as long as its size and mtime
+stay the same, so serving a cached copy costs two stats.
+"""
+import hashlib
+import os
+from threading import Lock
+
+import cv2
+from PIL import Image
+
+from writer import write_atomic
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+# Longest side in pixels of each derivative
+SIZES = {"thumb": 240, "web": 1280}
+
+
+class Gallery:
+    """Read-only view of albums {name: directory}, see the module docstring."""
+
+    def __init__(self, albums, cache_dir, sizes=None, quality=85):
+        self.albums = dict(albums)
+        self.cache_dir = cache_dir
+        self.sizes = dict(sizes or SIZES)
+        self.quality = quality
+
+        self._lock = Lock()
+        self._listings = {}
+        self._hashes = {}
+        self._making = {}
+
+    def path(self, album, name):
+        """Path of photo name in album, or None if there is no such photo (or the name tries to leave the album)."""
+        directory = self.albums.get(album)
+        if (directory is None or name != os.path.basename(name) or name.startswith(".")
+                or not name.lower().endswith(IMAGE_EXTENSIONS)):
+            return None
+        path = os.path.join(directory, name)
+        return path if os.path.isfile(path) else None
+
+    def names(self, album):
+        """All photo names in album, newest first."""
+        directory = self.albums[album]
+        try:
+            stamp = os.stat(directory).st_mtime_ns
+        except OSError:
+            return []
+        with self._lock:
+            cached = self._listings.get(album)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        with os.scandir(directory) as entries:
+            names = sorted((e.name for e in entries if not e.name.startswith(".")
+                            and e.name.lower().endswith(IMAGE_EXTENSIONS)), reverse=True)
+        with self._lock:
+            self._listings[album] = (stamp, names)
+        return names
+
+    def page(self, album, number, per_page):
+        """(names on page number, counting from 1, and the number of pages)."""
+        names = self.names(album)
+        pages = max(1, -(-len(names) // per_page))
+        start = (min(max(number, 1), pages) - 1) * per_page
+        return names[start:start + per_page], pages
+
+    def content_hash(self, path):
+        """SHA-1 of the file, recomputed only when its size or mtime changes."""
+        stat = os.stat(path)
+        key = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._hashes.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        with self._lock:
+            self._hashes[path] = (key, digest.hexdigest())
+        return digest.hexdigest()
+
+    def derivative(self, path, size):
+        """Path of the cached JPEG of path at size ("thumb" or "web") and its ETag, made now if needed."""
+        digest = self.content_hash(path)
+        target = os.path.join(self.cache_dir, size, digest[:2], f"{digest}.jpg")
+        if not os.path.exists(target):
+            # Two requests for the same new photo make it once
+            with self._lock:
+                lock = self._making.setdefault(target, Lock())
+            with lock:
+                if not os.path.exists(target):
+                    self._make(path, target, self.sizes[size])
+            with self._lock:
+                self._making.pop(target, None)
+        return target, f"{digest}-{size}"
+
+    def _make(self, path, target, longest):
+        with Image.open(path) as img:
+            width, height = img.size
+        # Let the decoder skip detail that is thrown away anyway, JPEG decodes at 1/2, 1/4 or 1/8 almost for free
+        reduction = next((r for r in (8, 4, 2) if max(width, height) // r >= longest), 1)
+        flags = {8: cv2.IMREAD_REDUCED_COLOR_8, 4: cv2.IMREAD_REDUCED_COLOR_4,
+                 2: cv2.IMREAD_REDUCED_COLOR_2, 1: cv2.IMREAD_COLOR}[reduction]
+        image = cv2.imread(path, flags)
+        if image is None:
+            raise ValueError(f"Could not decode {path}")
+        scale = longest / max(image.shape[:2])
+        if scale < 1:
+            image = cv2.resize(image, (max(int(image.shape[1] * scale), 1), max(int(image.shape[0] * scale), 1)),
+                               interpolation=cv2.INTER_AREA)
+        ok, data = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            raise ValueError(f"Could not encode a {longest} px copy of {path}")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        write_atomic(target, data.tobytes(), fsync="never")
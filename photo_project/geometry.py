@@ -0,0 +1,84 @@
+import cv2
+import numpy as np
+
+
+class CropPlan:
+    """Crop window and output size worked out once for a given camera resolution."""
+
+    def __init__(self, src_width, src_height, out_size=None, crop_width=None):
+        self.src_size = (src_width, src_height)
+
+        if crop_width is not None:
+            # Fixed width centre crop at full height (the 1440 crop)
+            self.w = min(crop_width, src_width)
+            self.h = src_height
+            self.x = (src_width - self.w) // 2
+            self.y = 0
+        elif out_size is not None:
+            # Centre crop to the aspect ratio of out_size
+            frame_aspect = src_width / src_height
+            target_aspect = out_size[0] / out_size[1]
+            if frame_aspect > target_aspect:
+                self.w = int(src_height * target_aspect)
+                self.h = src_height
+                self.x = (src_width - self.w) // 2
+                self.y = 0
+            else:
+                self.w = src_width
+                self.h = int(src_width / target_aspect)
+                self.x = 0
+                self.y = (src_height - self.h) // 2
+        else:
+            # Native frame, nothing to do
+            self.x, self.y, self.w, self.h = 0, 0, src_width, src_height
+
+        self.out_size = tuple(out_size) if out_size is not None else (self.w, self.h)
+        self.needs_resize = self.out_size != (self.w, self.h)
+
+    def crop(self, frame):
+        """Return the crop window as a view, no pixels are copied."""
+        return frame[self.y:self.y + self.h, self.x:self.x + self.w]
+
+    def apply(self, frame, dst=None, interpolation=cv2.INTER_LINEAR):
+        """Crop and resize in one pass, writing into dst when given."""
+        roi = self.crop(frame)
+        if not self.needs_resize:
+            return roi
+        return cv2.resize(roi, self.out_size, dst=dst, interpolation=interpolation)
+
+
+class FramePlanner:
+    """Applies a CropPlan to every frame, rebuilding it only when the input resolution changes.
+
+    Resized frames are written into a small ring of preallocated buffers, so a
+    returned frame stays valid until `buffers` more frames have been processed.
+    Use buffers=0 to get a freshly allocated array every time (for stills).
+    """
+
+    def __init__(self, out_size=None, crop_width=None, interpolation=cv2.INTER_LINEAR, buffers=2):
+        self.out_size = out_size
+        self.crop_width = crop_width
+        self.interpolation = interpolation
+        self.buffer_count = buffers
+        self.plan = None
+        self._buffers = []
+        self._next = 0
+
+    def plan_for(self, frame):
+        height, width = frame.shape[:2]
+        if self.plan is None or self.plan.src_size != (width, height):
+            self.plan = CropPlan(width, height, self.out_size, self.crop_width)
+            out_w, out_h = self.plan.out_size
+            shape = (out_h, out_w) + frame.shape[2:]
+            self._buffers = [np.empty(shape, dtype=frame.dtype) for _ in range(self.buffer_count)]
+            self._next = 0
+        return self.plan
+
+    def process(self, frame):
+        plan = self.plan_for(frame)
+        if not plan.needs_resize or not self._buffers:
+            return plan.apply(frame, interpolation=self.interpolation)
+
+        dst = self._buffers[self._next]
+        self._next = (self._next + 1) % len(self._buffers)
+        return plan.apply(frame, dst=dst, interpolation=self.interpolation)
@@ -0,0 +1,191 @@
+"""Several photos per print sheet.
+
+Imposer watches a directory (MERGE_DIR) for new composites and places
+each one on the current sheet as soon as it appears. A sheet goes to the
+print spooler when every slot is filled, or `timeout` seconds after its
+first photo so nobody waits for strangers to fill it. Sheets are built at
+the printer's DPI in preallocated buffers: a new sheet starts as a copy of
+a blank template with the cut marks already drawn, and every photo is
+resized straight into its slot.
+"""
+import fnmatch
+import os
+import time
+from threading import Thread, Event
+
+import cv2
+import numpy as np
+
+# Sheet size in inches (width, height) and the grid of photos on it
+LAYOUTS = {
+    "2up": dict(sheet=(6.0, 4.0), rows=1, cols=2),        # 4x6 landscape, two portrait photos
+    "4up": dict(sheet=(8.27, 11.69), rows=2, cols=2),     # A4
+    "strip": dict(sheet=(2.0, 6.0), rows=4, cols=1),      # classic 2x6 photo strip
+}
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+class SheetLayout:
+    """Pixel geometry of one layout at a DPI: sheet size, slot rectangles and the blank template.
+
+    photo_size is the size of the photos the cut marks are drawn for (the
+    kiosk's 900x1200 composites); ticks are at most half the gap long so they
+    stay clear of the neighbouring photo.
+    """
+
+    def __init__(self, name, dpi=300, margin=0.1, gap=0.1, mark_length=0.12, photo_size=(900, 1200)):
+        if name not in LAYOUTS:
+            raise ValueError(f"layout must be one of {tuple(LAYOUTS)}, not {name!r}")
+        spec = LAYOUTS[name]
+        self.name = name
+        self.dpi = dpi
+        self.size = (round(spec["sheet"][0] * dpi), round(spec["sheet"][1] * dpi))
+        margin_px, gap_px = round(margin * dpi), round(gap * dpi)
+        rows, cols = spec["rows"], spec["cols"]
+        cell_w = (self.size[0] - 2 * margin_px - (cols - 1) * gap_px) // cols
+        cell_h = (self.size[1] - 2 * margin_px - (rows - 1) * gap_px) // rows
+        self.cells = [(margin_px + c * (cell_w + gap_px), margin_px + r * (cell_h + gap_px), cell_w, cell_h)
+                      for r in range(rows) for c in range(cols)]
+        self.mark_length = max(min(round(mark_length * dpi), gap_px // 2), 1)
+        self.photo_size = photo_size
+        self._slots = {}
+
+    @property
+    def capacity(self):
+        return len(self.cells)
+
+    def slot(self, index, photo_size):
+        """Rectangle (x, y, w, h) of the photo in cell index, largest fit with the photo's aspect ratio, centred."""
+        key = (index, photo_size)
+        if key not in self._slots:
+            x, y, w, h = self.cells[index]
+            scale = min(w / photo_size[0], h / photo_size[1])
+            fit_w, fit_h = max(int(photo_size[0] * scale), 1), max(int(photo_size[1] * scale), 1)
+            self._slots[key] = (x + (w - fit_w) // 2, y + (h - fit_h) // 2, fit_w, fit_h)
+        return self._slots[key]
+
+    def template(self):
+        """White sheet with cut marks at the corners of where each photo of photo_size goes, pointing outwards."""
+        sheet = np.full((self.size[1], self.size[0], 3), 255, np.uint8)
+        length = self.mark_length
+        for i in range(self.capacity):
+            x, y, w, h = self.slot(i, self.photo_size)
+            for cx in (x, x + w - 1):
+                for cy in (y, y + h - 1):
+                    # One horizontal and one vertical tick pointing away from the photo
+                    dx = -length if cx == x else length
+                    dy = -length if cy == y else length
+                    cv2.line(sheet, (cx, cy), (cx + dx, cy), (128, 128, 128), 1)
+                    cv2.line(sheet, (cx, cy), (cx, cy + dy), (128, 128, 128), 1)
+        return sheet
+
+
+class Imposer:
+    """Collects new photos from watch_dir onto sheets and submits full (or timed out) sheets to a PrintSpooler.
+
+    Two sheet buffers are used in turn, so the next sheet can be filled
+    while the spooler is still encoding the last one.
+    """
+
+    def __init__(self, watch_dir, layout, spooler, pattern="merged_*", timeout=60.0, poll_interval=1.0,
+                 copies=1, interpolation=cv2.INTER_AREA):
+        self.watch_dir = watch_dir
+        self.layout = layout
+        self.spooler = spooler
+        self.pattern = pattern
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.copies = copies
+        self.interpolation = interpolation
+
+        self._template = layout.template()
+        self._buffers = [np.empty_like(self._template) for _ in range(2)]
+        self._buffer_jobs = [None, None]
+        self._current = 0
+        self._placed = 0
+        self._first_placed_at = None
+        self._seen = set()
+        self._stop = Event()
+        self._thread = None
+
+        self.sheets_sent = 0
+        self.photos_placed = 0
+        self.place_time = 0.0
+
+    def start(self):
+        if self._thread is None:
+            # Only photos taken from now on, not everything already in the directory
+            self._seen = set(self._scan())
+            self._thread = Thread(target=self._run, name="imposer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, flush=True):
+        """Stop watching. With flush, photos that arrived since the last poll are placed and the partly filled sheet is sent."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if flush:
+            self._place_new()
+            if self._placed:
+                self._send()
+
+    @property
+    def waiting(self):
+        """Photos on the sheet that hasn't been sent yet."""
+        return self._placed
+
+    def _scan(self):
+        try:
+            names = os.listdir(self.watch_dir)
+        except OSError:
+            return []
+        return [name for name in names if not name.startswith(".") and fnmatch.fnmatch(name, self.pattern)
+                and name.lower().endswith(IMAGE_EXTENSIONS)]
+
+    def _place_new(self):
+        for name in sorted(name for name in self._scan() if name not in self._seen):
+            self._seen.add(name)
+            self._place(os.path.join(self.watch_dir, name))
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            self._place_new()
+            if self._placed and time.monotonic() - self._first_placed_at >= self.timeout:
+                self._send()
+
+    def _sheet(self):
+        """Current sheet buffer, reset to the template when it is started."""
+        sheet = self._buffers[self._current]
+        if self._placed == 0:
+            job_id = self._buffer_jobs[self._current]
+            # The spooler still reads from this buffer until it has written the sheet to disk
+            while job_id is not None and (self.spooler.job(job_id) or {}).get("state") == "writing":
+                if self._stop.wait(0.05):
+                    break
+            np.copyto(sheet, self._template)
+            self._first_placed_at = time.monotonic()
+        return sheet
+
+    def _place(self, path):
+        photo = cv2.imread(path, cv2.IMREAD_COLOR)
+        if photo is None:
+            print(f"Error: Could not read {path} for the print sheet")
+            return
+        start = time.perf_counter()
+        sheet = self._sheet()
+        x, y, w, h = self.layout.slot(self._placed, (photo.shape[1], photo.shape[0]))
+        cv2.resize(photo, (w, h), dst=sheet[y:y + h, x:x + w], interpolation=self.interpolation)
+        self._placed += 1
+        self.photos_placed += 1
+        self.place_time = time.perf_counter() - start
+        if self._placed >= self.layout.capacity:
+            self._send()
+
+    def _send(self):
+        self._buffer_jobs[self._current] = self.spooler.submit(self._buffers[self._current], copies=self.copies)
+        self.sheets_sent += 1
+        self._placed = 0
+        self._current = (self._current + 1) % len(self._buffers)
@@ -1,15 +1,41 @@
+import argparse
 import cv2
 import os
-import datetime
 import time
 import numpy as np
 import tkinter as tk
-from PIL import Image, ImageTk
-from threading import Thread
+from PIL import ImageTk
+from camera_reader import CameraReader
+from geometry import FramePlanner
+from border_cache import BorderCache
+from compositing import ScaledCompositor
+from display import CanvasDisplay
+from writer import ImageWriter
+from encoders import Encoder
+import config
+from sources import open_source
+from metrics import REGISTRY, MetricsPublisher
+from scheduler import FrameScheduler, ThermalMonitor, default_levels
+from sleep_mode import SleepController
+from motion import MotionDetector
+from capture_modes import CaptureModeManager
+from profiles import PROFILE_NAMES, make_planner, resolve_profile
+from print_spooler import PrintSpooler
+from imposition import Imposer, SheetLayout
+from frame_bus import FrameBus
+from catalog import Catalog, new_session_id
+from retention import RetentionManager
+from best_shot import Burst
+
+# One kiosk for every machine, the old script variants are profiles now (see profiles.py)
+parser = argparse.ArgumentParser(description="Photo booth kiosk")
+parser.add_argument("--profile", choices=PROFILE_NAMES, default=config.PROFILE, help="performance profile, default %(default)s")
+parser.add_argument("--recalibrate", action="store_true", help="measure this device again for the auto profile")
+args = parser.parse_args()
 
 # Directories
-CAPTURE_DIR = "captured_images"
-MERGE_DIR = "merge"
+CAPTURE_DIR = config.CAPTURE_DIR
+MERGE_DIR = config.MERGE_DIR
 BORDER_IMAGES = ["frame1.png", "frame2.png", "frame3.png", "frame4.png"]
 os.makedirs(CAPTURE_DIR, exist_ok=True)
 os.makedirs(MERGE_DIR, exist_ok=True)
@@ -21,8 +47,60 @@ selected_border_idx = -1
 border_applied_frame = None
 countdown_active = False
 countdown_start_time = None
+countdown_deadline = None  # time.monotonic() at zero, the photo is the frame read closest to it
+session_id = None  # of the photo on screen, see catalog.py
 countdown_duration = 0
 last_activity_time = time.time()
+last_frame_seq = 0
+write_status_text = None
+frame_job = None
+print_job = None
+print_status_text = None
+hud_visible = False
+hud_last = None
+
+# Live metrics, published once a second for server.py's /metrics route (see metrics.py)
+update_frame_seconds = REGISTRY.histogram("photo_update_frame_seconds", "Time spent in update_frame() for a new frame")
+frame_age_seconds = REGISTRY.histogram("photo_frame_age_seconds", "Time from the camera read to the frame being drawn")
+blit_seconds = REGISTRY.histogram("photo_display_blit_seconds", "Time to draw one frame on the canvas")
+save_seconds = REGISTRY.histogram("photo_save_seconds", "Time from taking or saving a photo to the file being on disk")
+photos_taken = REGISTRY.counter("photo_captures_total", "Photos taken")
+burst_score_seconds = REGISTRY.histogram("photo_burst_score_seconds", "Time to pick the best frame of a burst")
+shutter_delta_seconds = REGISTRY.histogram("photo_shutter_delta_seconds", "Time between the end of the countdown and the frame that became the photo, either way")
+metrics_publisher = MetricsPublisher(REGISTRY, config.METRICS_PATH, config.METRICS_INTERVAL)
+
+# Captures and merges are written by one background thread, never on the Tk thread
+# and every file they write gets a row in the SQLite catalog from that thread too
+catalog = Catalog(config.CATALOG_PATH)
+image_writer = ImageWriter(maxsize=config.WRITE_QUEUE_SIZE, fsync=config.WRITE_FSYNC, latency=save_seconds, catalog=catalog).start()
+capture_encoder = Encoder.from_spec(config.CAPTURE_ENCODER)
+
+# Old photos are deleted in the background before the card fills up, never while a photo is being saved
+retention = RetentionManager([CAPTURE_DIR, MERGE_DIR], max_bytes=config.RETENTION_MAX_BYTES, max_files=config.RETENTION_MAX_FILES,
+                             max_age_days=config.RETENTION_MAX_AGE_DAYS, min_free_bytes=config.RETENTION_MIN_FREE_BYTES,
+                             warn_free_bytes=config.DISK_WARN_FREE_BYTES, critical_free_bytes=config.DISK_CRITICAL_FREE_BYTES,
+                             keep_seconds=config.RETENTION_KEEP_SECONDS, interval=config.RETENTION_INTERVAL,
+                             busy=lambda: image_writer.pending > 0, catalog_path=config.CATALOG_PATH,
+                             cache_dir=config.GALLERY_CACHE_DIR)
+REGISTRY.gauge("photo_disk_free_bytes", "Free space on the photo disk", lambda: retention.free_bytes)
+REGISTRY.gauge("photo_stored_bytes", "Bytes in the photo directories", lambda: retention.used_bytes)
+REGISTRY.counter("photo_retention_deleted_total", "Photos deleted by retention", lambda: retention.deleted)
+
+# Print jobs queue up on disk and go to the printer from their own thread, also after a restart
+print_spooler = PrintSpooler(config.PRINT_SPOOL_DIR, command=config.PRINT_COMMAND, encoder=config.PRINT_ENCODER,
+                             max_attempts=config.PRINT_ATTEMPTS, timeout=config.PRINT_TIMEOUT,
+                             latency=REGISTRY.histogram("photo_print_seconds", "Time from pressing Print to the printer accepting the job"))
+REGISTRY.counter("photo_prints_total", "Print jobs the printer accepted", lambda: print_spooler.printed)
+REGISTRY.counter("photo_print_failures_total", "Print jobs that failed after all attempts", lambda: print_spooler.failed)
+REGISTRY.gauge("photo_print_queue", "Print jobs waiting or printing", lambda: print_spooler.pending)
+
+# Saved photos can also be gathered onto shared print sheets, built on the imposer's own thread
+imposer = None
+if config.IMPOSITION_LAYOUT:
+    imposer = Imposer(MERGE_DIR, SheetLayout(config.IMPOSITION_LAYOUT, dpi=config.PRINT_DPI), print_spooler,
+                      timeout=config.IMPOSITION_TIMEOUT, copies=config.PRINT_COPIES)
+    REGISTRY.counter("photo_print_sheets_total", "Print sheets sent to the spooler", lambda: imposer.sheets_sent)
+    REGISTRY.gauge("photo_print_sheet_waiting", "Photos on the print sheet not sent yet", lambda: imposer.waiting)
 
 # Initialize Tkinter window
 root = tk.Tk()
@@ -37,6 +115,14 @@ main_frame.pack(fill=tk.BOTH, expand=True)
 video_canvas = tk.Canvas(main_frame, bg="black")
 video_canvas.pack(fill=tk.BOTH, expand=True)
 
+# One PhotoImage updated in place, the canvas size is tracked from <Configure> events
+display = CanvasDisplay(video_canvas, interpolation=config.DISPLAY_INTERPOLATION)
+
+# fps/latency overlay, toggled with config.HUD_KEY. Created after the display so it stays on top
+hud_item = video_canvas.create_text(10, 10, anchor=tk.NW, fill="yellow", font=("Courier", 14, "bold"), state=tk.HIDDEN)
+# Low disk warning in the top right corner
+disk_item = video_canvas.create_text(0, 10, anchor=tk.NE, fill="orange", font=("Helvetica", 16, "bold"), state=tk.HIDDEN)
+
 # Text display area (above buttons)
 text_display_area = tk.Label(main_frame, text="Select timer", font=("Arial", 16))
 text_display_area.pack(pady=5)
@@ -74,23 +160,88 @@ btn_print.place(relx=0.8, y=10, width=150, height=50, anchor=tk.N)
 # Frame selection area
 frame_selection_frame = tk.Frame(button_frame)
 
+# Borders are decoded and resized once, and reloaded in the background when a file changes (e.g. an upload through server.py)
+border_cache = BorderCache(BORDER_IMAGES, size=(900, 1200), thumb_size=(100, 50), preview_size=config.BORDER_PREVIEW_SIZE)
+
 border_labels = []
-for i in range(4):
-    border_img = Image.open(BORDER_IMAGES[i])
-    border_img = border_img.resize((100, 50), Image.ANTIALIAS)
-    border_photo = ImageTk.PhotoImage(border_img)
+for i in range(len(border_cache)):
+    border_photo = ImageTk.PhotoImage(border_cache.get(i).thumbnail)
     label = tk.Label(frame_selection_frame, image=border_photo)
     label.image = border_photo
     label.pack(side=tk.LEFT, padx=5)
     border_labels.append(label)
 
-# Camera initialization, please change the index from 0 to any number according to your camera, if you get the error of camera not found
-camera = cv2.VideoCapture(0)
+# Camera initialization, the source comes from config.CAMERA_SOURCE (change the camera index there if you get the error of camera not found)
+camera = open_source(config.CAMERA_SOURCE)
 if not camera.isOpened():
-    print("Error: Camera not found!")
+    print(f"Error: Camera not found! ({config.CAMERA_SOURCE})")
     camera.release()
     exit()
 
+# Frames are grabbed on their own thread, update_frame() only picks up the newest one
+reader = CameraReader(camera, opener=lambda: open_source(config.CAMERA_SOURCE), ring_bytes=config.ZSL_RING_BYTES)
+reader.start()
+REGISTRY.counter("photo_frames_captured_total", "Frames read from the camera", lambda: reader.frames_captured)
+REGISTRY.counter("photo_frames_displayed_total", "Frames drawn on screen", lambda: reader.frames_displayed)
+REGISTRY.counter("photo_frames_dropped_total", "Frames read but never drawn", lambda: reader.frames_dropped)
+REGISTRY.counter("photo_camera_read_errors_total", "Failed camera reads", lambda: reader.read_errors)
+REGISTRY.counter("photo_writes_total", "Photos written to disk", lambda: image_writer.written)
+REGISTRY.counter("photo_write_failures_total", "Photos that could not be written", lambda: image_writer.failed)
+REGISTRY.gauge("photo_write_queue", "Photos waiting to be written", lambda: image_writer.pending)
+
+# What the screen shows goes to server.py's /stream through shared memory, only while someone watches
+frame_bus = None
+if config.FRAME_BUS_NAME:
+    frame_bus = FrameBus(config.FRAME_BUS_NAME, create=True, size=config.STREAM_SIZE, max_fps=config.STREAM_MAX_FPS)
+
+# Selected border scaled down to the canvas for the live preview
+preview_border = ScaledCompositor()
+
+# Settle the window so the canvas has its real size, "auto" measures the blit on it
+root.update()
+profile = resolve_profile(args.profile, reader, display, border_cache.get(0).border, config.CAMERA_SOURCE, args.recalibrate)
+print(f"Profile {args.profile}: {profile['fps']} fps, preview scale {profile['preview_scale']}, crop {profile['crop']}")
+if profile["camera_size"] is not None:
+    reader.request_resolution(*profile["camera_size"])
+merge_encoder = Encoder.from_spec(profile["merge_encoder"])
+
+# low_res previews at low resolution and takes full resolution stills, see capture_modes.py
+capture_modes = None
+if profile["capture_mode"] is not None:
+    capture_modes = CaptureModeManager(reader, config.PREVIEW_RESOLUTION, config.STILL_RESOLUTION, strategy=profile["capture_mode"])
+    capture_modes.start()
+
+# Live frames are cropped as the profile says, photos are always cropped and resized to 900x1200 portrait
+live_planner = make_planner(profile["crop"])
+still_planner = FramePlanner(out_size=(900, 1200), buffers=0)
+
+# A few frames around the end of the countdown, the sharpest well exposed one becomes the photo
+burst = None
+if capture_modes is None and config.BURST_AFTER > 0:
+    burst = Burst(before=config.BURST_BEFORE, after=config.BURST_AFTER, window=config.BURST_WINDOW)
+
+# Paces update_frame() to the profile's fps and trades preview quality for speed when it falls behind
+def on_quality_change(level):
+    display.scale = level.display_scale
+    display.interpolation = level.interpolation
+    print(f"Live view quality level {scheduler.level_index}: {level}")
+
+thermal = ThermalMonitor(limit=config.THERMAL_LIMIT, clear=config.THERMAL_LIMIT - 5)
+quality_levels = default_levels(profile["interpolation"], max_scale=profile["preview_scale"])
+scheduler = FrameScheduler(
+    profile["fps"],
+    levels=quality_levels if config.ADAPTIVE_QUALITY else quality_levels[:1],
+    thermal=thermal,
+    on_change=on_quality_change,
+    lateness=REGISTRY.histogram("photo_loop_lateness_seconds", "How late update_frame() ran after its deadline"),
+    source_fps=lambda: reader.capture_fps,
+)
+on_quality_change(scheduler.level)
+REGISTRY.gauge("photo_quality_level", "Live view quality level, 0 is best", lambda: scheduler.level_index)
+REGISTRY.gauge("photo_target_fps", "Frame rate the live view currently aims for", lambda: 1 / scheduler.period)
+REGISTRY.gauge("photo_thermal_throttled", "1 while the CPU is hot or being throttled", lambda: int(thermal.throttled))
+REGISTRY.gauge("photo_cpu_temperature_celsius", "Hottest thermal zone", lambda: thermal.temperature or 0.0)
+
 overlay = tk.Frame(root, bg="black")
 overlay.place(relwidth=1, relheight=1)  
 overlay.lift()  
@@ -100,10 +251,52 @@ overlay.place_forget()
 sleeping_label = tk.Label(overlay, text="Sleeping", font=("Arial", 50), fg="white", bg="black")
 sleeping_label.place(relx=0.5, rely=0.5, anchor="center")
 
+def on_sleep():
+    """Stop drawing altogether, the reader has already closed or slowed down the camera"""
+    global frame_job
+    if frame_job is not None:
+        root.after_cancel(frame_job)
+        frame_job = None
+    sleeping_label.config(text="Sleeping")
+    overlay.place(relwidth=1, relheight=1)
+    overlay.lift()
+
+def on_wake():
+    global frame_job
+    sleeping_label.config(text="Waking up...")
+    scheduler.reset()
+    if frame_job is None:
+        frame_job = root.after(0, update_frame)
+
+def on_wake_ready(wake_time):
+    overlay.place_forget()
+    if wake_time is not None:
+        wake_seconds.observe(wake_time)
+        print(f"Woke up in {wake_time * 1000:.0f} ms")
+
+# After config.SLEEP_TIMEOUT seconds without activity the frame loop stops and the camera is
+# closed (or only sampled, see config.SLEEP_CAMERA) until someone touches the screen or, with
+# config.MOTION_WAKE, walks up to the booth
+motion_detector = None
+if config.MOTION_WAKE and config.SLEEP_CAMERA == "low_rate":
+    motion_detector = MotionDetector(threshold=config.MOTION_THRESHOLD, min_area=config.MOTION_MIN_AREA)
+elif config.MOTION_WAKE:
+    print("Motion wake needs SLEEP_CAMERA = \"low_rate\", waking on touch only")
+sleep_ctl = SleepController(reader, timeout=config.SLEEP_TIMEOUT, camera_mode=config.SLEEP_CAMERA,
+                            sample_interval=config.SLEEP_SAMPLE_INTERVAL, wake_timeout=config.WAKE_TIMEOUT,
+                            on_sleep=on_sleep, on_wake=on_wake, on_ready=on_wake_ready,
+                            detector=motion_detector, sample_size=config.SLEEP_RESOLUTION)
+wake_seconds = REGISTRY.histogram("photo_wake_seconds", "Time from waking up to the first live frame on screen")
+REGISTRY.gauge("photo_asleep", "1 while the kiosk is asleep", lambda: int(sleep_ctl.asleep))
+REGISTRY.counter("photo_sleeps_total", "Times the kiosk went to sleep", lambda: sleep_ctl.sleeps)
+REGISTRY.counter("photo_motion_wakes_total", "Times motion in front of the camera woke the kiosk", lambda: sleep_ctl.motion_wakes)
+
 def show_timer_buttons():
     action_btn_frame.pack_forget()  
     frame_selection_frame.pack_forget()  
     timer_btn_frame.pack(side=tk.TOP, fill=tk.X, pady=5) 
+    # Borders stay selectable in live view so guests see them before the photo is taken
+    frame_selection_frame.pack(side=tk.BOTTOM, pady=5)
 
 def show_action_buttons():
     timer_btn_frame.pack_forget() 
@@ -114,120 +307,204 @@ show_timer_buttons()  # This will properly initialize the visible buttons
 
 
 
-def save_frame(frame):
-    global captured_frame, paused, border_applied_frame
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    filename = os.path.join(CAPTURE_DIR, f"capture_{timestamp}.jpg")
+def save_frame(frame, frame_time=None):
+    """frame_time is when the camera read the frame (time.monotonic()), to record how close it came to the countdown"""
+    global captured_frame, paused, border_applied_frame, session_id
+    # Millisecond session IDs, two photos in the same second used to overwrite each other
+    session_id = new_session_id()
+    shutter_delta = None
+    if frame_time is not None and countdown_deadline is not None:
+        shutter_delta = frame_time - countdown_deadline
+        shutter_delta_seconds.observe(abs(shutter_delta))
+    filename = os.path.join(CAPTURE_DIR, f"capture_{session_id}{capture_encoder.ext}")
     
     # Frame is 900x1200 at this point, marking for saturday
     
-    cv2.imwrite(filename, frame)
     captured_frame = frame.copy()
+    image_writer.submit(filename, captured_frame, capture_encoder.params,
+                        record=dict(session=session_id, kind="capture", started=countdown_start_time, captured=time.time(),
+                                    shutter_delta=shutter_delta))
+    photos_taken.inc()
     paused = True
     border_applied_frame = None
     text_display_area.config(text="Select frame and click Save")
     show_action_buttons()
 
+    # Border picked during live view, the full resolution merge is only made now
+    if selected_border_idx >= 0:
+        apply_border()
+
+def finish_burst():
+    """Save the best frame of the burst, and with BURST_KEEP_OTHERS the rest for a retake"""
+    best, others = burst.best()
+    burst_score_seconds.observe(burst.score_time)
+    save_frame(still_planner.process(best), burst.best_time)
+    if config.BURST_KEEP_OTHERS:
+        for i, other in enumerate(others, 1):
+            image_writer.submit(os.path.join(CAPTURE_DIR, f"capture_{session_id}_alt{i}{capture_encoder.ext}"),
+                                still_planner.process(other), capture_encoder.params,
+                                record=dict(session=session_id, kind="alternate"))
+    burst.reset()
+
 def apply_border():
     global captured_frame, selected_border_idx, border_applied_frame
     if captured_frame is None or selected_border_idx < 0:
         return
 
-    border_img = cv2.imread(BORDER_IMAGES[selected_border_idx], cv2.IMREAD_UNCHANGED)
-    if border_img is None:
-        print("Error: Border image not found.")
-        return
-
-    border_resized = cv2.resize(border_img, (900, 1200))
+    # Integer blend over the non-transparent part of the border only, no disk access
+    border_applied_frame = border_cache.get(selected_border_idx).compositor.apply(captured_frame)
+    text_display_area.config(text=f"Border {selected_border_idx+1} applied")
 
-    if border_resized.shape[-1] == 4:
-        overlay = border_resized[:, :, :3]
-        mask = border_resized[:, :, 3] / 255.0
-        merged_image = (captured_frame * (1 - mask[..., None]) + overlay * mask[..., None])
-        merged_image = merged_image.astype(np.uint8)
+def refresh_borders():
+    """Pick up borders the cache reloaded from disk"""
+    for idx in border_cache.pop_changed():
+        border_photo = ImageTk.PhotoImage(border_cache.get(idx).thumbnail)
+        border_labels[idx].config(image=border_photo)
+        border_labels[idx].image = border_photo
+        if idx == selected_border_idx:
+            apply_border()
+    root.after(500, refresh_borders)
+
+def update_write_status():
+    """Warn on screen while photos are backing up in the write queue"""
+    global write_status_text
+    if image_writer.busy:
+        if write_status_text is None:
+            write_status_text = text_display_area.cget("text")
+        text_display_area.config(text=f"Saving photos, please wait ({image_writer.pending} queued)")
+    elif write_status_text is not None:
+        text_display_area.config(text=write_status_text)
+        write_status_text = None
+    root.after(250, update_write_status)
+
+def update_disk_status():
+    """Show the retention manager's disk warning until there is space again"""
+    message = retention.message
+    if message is None:
+        video_canvas.itemconfig(disk_item, state=tk.HIDDEN)
     else:
-        merged_image = cv2.addWeighted(captured_frame, 0.7, border_resized, 0.3, 0)
-
-    border_applied_frame = merged_image
-    text_display_area.config(text=f"Border {selected_border_idx+1} applied")
+        video_canvas.coords(disk_item, video_canvas.winfo_width() - 10, 10)
+        video_canvas.itemconfig(disk_item, state=tk.NORMAL, text=message,
+                                fill="red" if retention.status == "critical" else "orange")
+        video_canvas.tag_raise(disk_item)
+    root.after(2000, update_disk_status)
+
+def check_sleep():
+    sleep_ctl.check(last_activity_time)
+    # While asleep this is also what looks at the sampled frames for motion
+    root.after(int(config.SLEEP_SAMPLE_INTERVAL * 1000) if sleep_ctl.asleep else 1000, check_sleep)
+
+def toggle_hud(event=None):
+    global hud_visible, hud_last
+    hud_visible = not hud_visible
+    hud_last = None
+    video_canvas.itemconfig(hud_item, state=tk.NORMAL if hud_visible else tk.HIDDEN, text="")
+
+def update_hud():
+    """Refresh the overlay from the metrics, averaged over the last half second"""
+    global hud_last
+    if hud_visible:
+        now = time.perf_counter()
+        sample = (now, reader.frames_displayed, update_frame_seconds.count, update_frame_seconds.sum,
+                  frame_age_seconds.count, frame_age_seconds.sum)
+        if hud_last is not None:
+            elapsed = now - hud_last[0]
+            frames = sample[1] - hud_last[1]
+            frame_ms = (sample[3] - hud_last[3]) / max(sample[2] - hud_last[2], 1) * 1000
+            age_ms = (sample[5] - hud_last[5]) / max(sample[4] - hud_last[4], 1) * 1000
+            video_canvas.itemconfig(hud_item, text=(
+                f"fps {frames / elapsed:5.1f}\n"
+                f"frame {frame_ms:5.1f} ms\n"
+                f"age {age_ms:5.1f} ms\n"
+                f"blit {display.blit_avg * 1000:5.1f} ms\n"
+                f"dropped {reader.frames_dropped}\n"
+                f"queue {image_writer.pending}\n"
+                f"level {scheduler.level_index} late {scheduler.lateness * 1000:4.1f} ms"
+                + (f"\ntemp {thermal.temperature:.0f} C" if thermal.temperature is not None else "")
+                + (" THROTTLED" if thermal.throttled else "")))
+        hud_last = sample
+    root.after(500, update_hud)
 
 def update_frame():
-    global paused, countdown_active, countdown_start_time, countdown_duration, captured_frame, border_applied_frame, last_activity_time
+    global paused, countdown_active, countdown_start_time, countdown_duration, captured_frame, border_applied_frame, last_activity_time, last_frame_seq, frame_job
+
+    frame_start = time.perf_counter()
+    frame_time = None
+    scheduler.begin()
+
+    if not paused and capture_modes is not None and capture_modes.waiting:
+        # Countdown is over, wait for the full resolution still without blocking the UI
+        still = capture_modes.poll_still()
+        if still is None:
+            frame_job = root.after(10, update_frame)
+            return
+        print(f"Still {still.shape[1]}x{still.shape[0]} ready {capture_modes.still_latency * 1000:.0f} ms after the countdown ({capture_modes.strategy})")
+        save_frame(still_planner.process(still), time.monotonic())
+
+    if not paused and burst is not None and burst.done:
+        finish_burst()
 
     if not paused:
-        ret, frame = camera.read()
-        if not ret:
-            print("Error: Unable to read from camera.")
+        latest = reader.latest(last_frame_seq)
+        if latest is None:
+            # Nothing new from the camera yet, check again shortly
+            frame_job = root.after(5, update_frame)
             return
+        last_frame_seq, frame_time, raw = latest
+        reader.mark_displayed()
 
-        # Get frame dimensions
-        height, width, _ = frame.shape
-        
-        # Target dimensions (900 width x 1200 height - PORTRAIT orientation)
-        target_width = 900
-        target_height = 1200
-        
-        # Calculate aspect ratios
-        frame_aspect = width / height
-        target_aspect = target_width / target_height
-        
-        if frame_aspect > target_aspect:
-            new_width = int(height * target_aspect)
-            left = (width - new_width) // 2
-            frame = frame[:, left:left+new_width]
-        else:
-            new_height = int(width / target_aspect)
-            top = (height - new_height) // 2
-            frame = frame[top:top+new_height, :] 
-            
-        frame = cv2.resize(frame, (target_width, target_height))
+        # Crop as the profile says, the plan is only recomputed if the camera resolution changes
+        frame = live_planner.process(capture_modes.preview(raw) if capture_modes is not None else raw)
+        if (countdown_active or selected_border_idx >= 0) and np.may_share_memory(frame, raw):
+            # Never draw on the reader's frame, it can still become the photo
+            frame = frame.copy()
 
         if countdown_active:
             elapsed_time = time.time() - countdown_start_time
             remaining_time = countdown_duration - int(elapsed_time)
 
             if remaining_time > 0:
+                if burst is not None:
+                    burst.offer(raw, frame_time, countdown_duration - elapsed_time)
                 cv2.putText(frame, str(remaining_time), 
                            (frame.shape[1]//2-50, frame.shape[0]//2),
                            cv2.FONT_HERSHEY_SIMPLEX, 4, (0, 255, 0), 4)
+            elif capture_modes is not None:
+                capture_modes.request_still()
+                text_display_area.config(text="Capturing...")
+                countdown_active = False
             else:
-                save_frame(frame)
+                # Zero passed somewhere since the last frame, take the one the camera read closest to it
+                shot_time, shot = reader.frame_at(countdown_deadline)
+                if burst is not None:
+                    before = reader.frames_between(countdown_deadline - burst.window, shot_time) if reader.ring_bytes else None
+                    burst.start(shot, shot_time, before)
+                    text_display_area.config(text="Capturing...")
+                else:
+                    save_frame(still_planner.process(shot), shot_time)
                 countdown_active = False
+        elif burst is not None and burst.collecting:
+            burst.add(raw, frame_time)
 
     if paused and captured_frame is not None:
         frame = border_applied_frame if border_applied_frame is not None else captured_frame
 
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    img = Image.fromarray(frame_rgb)
+    if not paused and selected_border_idx >= 0:
+        # Live border preview, blended at canvas size rather than on the full frame
+        frame = display.fit(frame)
+        border = border_cache.get(selected_border_idx).source_for((frame.shape[1], frame.shape[0]))
+        preview_border.get(border, (frame.shape[1], frame.shape[0])).apply(frame, dst=frame)
 
-    canvas_width = video_canvas.winfo_width()
-    canvas_height = video_canvas.winfo_height()
-    img_ratio = img.width / img.height
-    canvas_ratio = canvas_width / canvas_height
+    display.show(frame)
+    blit_seconds.observe(display.blit_time)
+    if frame_bus is not None and frame_bus.wanted():
+        frame_bus.publish(frame, frame_time)
+    if frame_time is not None:
+        frame_age_seconds.observe(time.monotonic() - frame_time)
+        update_frame_seconds.observe(time.perf_counter() - frame_start)
+    sleep_ctl.frame_shown(frame_time)
 
-    if canvas_ratio > img_ratio:
-        new_height = canvas_height
-        new_width = int(new_height * img_ratio)
-    else:
-        new_width = canvas_width
-        new_height = int(new_width / img_ratio)
-
-    img = img.resize((new_width, new_height), Image.ANTIALIAS)
-    imgtk = ImageTk.PhotoImage(image=img)
-
-    video_canvas.delete("all")
-    video_canvas.create_image(
-        (canvas_width - new_width) // 2, (canvas_height - new_height) // 2,
-        anchor=tk.NW, image=imgtk
-    )
-    video_canvas.imgtk = imgtk
-
-    if time.time() - last_activity_time > 120:
-        overlay.place(relwidth=1, relheight=1)
-    else:
-        overlay.place_forget()
-
-    root.after(30, update_frame)
+    frame_job = root.after(scheduler.end(), update_frame)
 
 
 
@@ -245,30 +522,40 @@ def update_frame():
 
     
 def start_countdown(duration):
-    global countdown_active, countdown_start_time, countdown_duration, last_activity_time
+    global countdown_active, countdown_start_time, countdown_duration, countdown_deadline, last_activity_time
     countdown_duration = duration
     countdown_active = True
     countdown_start_time = time.time()
+    countdown_deadline = time.monotonic() + duration
+    if burst is not None:
+        burst.reset()
     last_activity_time = time.time()
     text_display_area.config(text=f"{duration}-second timer started")
 
 def on_border_click(event, index):
     global selected_border_idx, last_activity_time
-    selected_border_idx = index
     last_activity_time = time.time()
+    if not paused:
+        # Live preview: tapping the selected border again turns it off
+        selected_border_idx = -1 if selected_border_idx == index else index
+        text_display_area.config(text=f"Border {index+1} selected" if selected_border_idx >= 0 else "Select timer")
+        return
+    selected_border_idx = index
     apply_border()
 
 def on_save():
     global last_activity_time
     if border_applied_frame is not None:
-        save_path = os.path.join(MERGE_DIR, f"merged_{datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.png")
-        cv2.imwrite(save_path, border_applied_frame)
+        save_path = os.path.join(MERGE_DIR, f"merged_{session_id}_b{selected_border_idx + 1}{merge_encoder.ext}")
+        image_writer.submit(save_path, border_applied_frame, merge_encoder.params,
+                            record=dict(session=session_id, kind="merge", border=selected_border_idx))
         text_display_area.config(text=f"Saved: {save_path}")
     last_activity_time = time.time()
 
 def on_resume():
-    global paused, captured_frame, border_applied_frame, selected_border_idx, last_activity_time
+    global paused, captured_frame, border_applied_frame, selected_border_idx, last_activity_time, print_job
     paused = False
+    print_job = None  # the job keeps going, only the screen moves on
     captured_frame = None
     border_applied_frame = None
     selected_border_idx = -1
@@ -277,9 +564,49 @@ def on_resume():
     text_display_area.config(text="Select timer")
 
 def on_print():
-    global last_activity_time
-    text_display_area.config(text="Printing...")
+    """Print, or cancel / retry the print of the photo on screen, depending on how its job is doing"""
+    global last_activity_time, print_job
     last_activity_time = time.time()
+    job = print_spooler.job(print_job) if print_job is not None else None
+    if job is not None and job["state"] in ("writing", "queued", "printing"):
+        print_spooler.cancel(print_job)
+    elif job is not None and job["state"] == "failed":
+        print_spooler.retry(print_job)
+    else:
+        image = border_applied_frame if border_applied_frame is not None else captured_frame
+        if image is None:
+            return
+        print_job = print_spooler.submit(image, copies=config.PRINT_COPIES)
+    update_print_status(reschedule=False)
+
+def update_print_status(reschedule=True):
+    """Show how the print of the current photo is doing, the button turns into Cancel / Retry"""
+    global print_status_text
+    job = print_spooler.job(print_job) if print_job is not None else None
+    if job is None:
+        text, button = None, "Print"
+    elif job["state"] in ("writing", "queued"):
+        ahead = print_spooler.position(print_job)
+        text, button = f"Waiting to print ({ahead} ahead)" if ahead else "Sending to printer...", "Cancel print"
+        if job["error"]:
+            text += f", retrying: {job['error']}"
+    elif job["state"] == "printing":
+        text, button = "Printing...", "Cancel print"
+    elif job["state"] == "done":
+        text, button = f"Sent to printer ({job['copies']} cop{'y' if job['copies'] == 1 else 'ies'})", "Print"
+    elif job["state"] == "failed":
+        text, button = f"Print failed: {job['error']}", "Retry print"
+    else:
+        text, button = "Print cancelled", "Print"
+
+    if btn_print.cget("text") != button:
+        btn_print.config(text=button)
+    if text != print_status_text:
+        print_status_text = text
+        if text is not None:
+            text_display_area.config(text=text)
+    if reschedule:
+        root.after(500, update_print_status)
 
 # Bind events
 for idx, label in enumerate(border_labels):
@@ -295,22 +622,52 @@ btn_print.config(command=on_print)
 # Initial state
 show_timer_buttons()
 
-# Start video feed in a separate thread
-def video_thread():
-    update_frame()
-
-Thread(target=video_thread, daemon=True).start()
+# The capture thread is already running, the display loop runs on the Tk thread
+border_cache.start()
+update_frame()
+check_sleep()
+refresh_borders()
+update_write_status()
+update_disk_status()
+update_print_status()
+update_hud()
+metrics_publisher.start()
+print_spooler.start()
+retention.start()
+if imposer is not None:
+    imposer.start()
 
 # Track mouse movement for inactivity
 def on_activity(event):
     global last_activity_time
     last_activity_time = time.time()
+    sleep_ctl.wake()
 
 root.bind("<Motion>", on_activity)
 root.bind("<ButtonPress>", on_activity)
+root.bind(config.HUD_KEY, toggle_hud)
 
 root.mainloop()
 
 # Release resources
-camera.release()
+reader.stop()
+metrics_publisher.stop()
+image_writer.close()  # flush photos that are still queued
+retention.stop()
+catalog.close()
+if imposer is not None:
+    imposer.stop()  # a partly filled sheet is printed rather than lost
+print_spooler.stop()  # queued prints stay in the spool for the next start
+border_cache.stop()
+if frame_bus is not None:
+    frame_bus.close()
+stats = reader.stats()
+print(f"Frames captured: {stats['captured']}, displayed: {stats['displayed']}, dropped: {stats['dropped']}")
+print(f"Average display blit: {display.blit_avg * 1000:.1f} ms")
+if capture_modes is not None and capture_modes.still_latencies:
+    latencies = sorted(capture_modes.still_latencies)
+    print(f"Still latency over {len(latencies)} shots: median {latencies[len(latencies) // 2] * 1000:.0f} ms, max {latencies[-1] * 1000:.0f} ms")
+if sleep_ctl.wake_times:
+    print(f"Slept {sleep_ctl.sleeps} times for {sleep_ctl.slept_seconds / 60:.0f} min, slowest wake {max(sleep_ctl.wake_times) * 1000:.0f} ms")
+reader.camera.release()
 cv2.destroyAllWindows()
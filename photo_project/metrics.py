@@ -0,0 +1,190 @@
+"""Counters and histograms for the kiosk, published for server.py's /metrics route.
+
+Metrics are updated in the hot path without locks. Each metric is only
+ever written by one thread (update_frame() on the Tk thread, the image
+writer on its own thread, ...), so a plain += is enough, and the publisher
+thread only reads. A scrape may see a histogram mid-update, which is off by
+at most one observation and fine for monitoring.
+
+MetricsPublisher renders everything in Prometheus text format once a second
+into a small file on tmpfs (config.METRICS_PATH, /dev/shm by default), so
+publishing never touches the SD card and server.py only has to read a file.
+"""
+import bisect
+import os
+import time
+from threading import Thread, Event
+
+from writer import write_atomic
+
+# Seconds, from well under a frame up to a slow save or print
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.02, 0.033, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Increasing count, bumped with inc() or read from a function (e.g. CameraReader.frames_captured)."""
+
+    def __init__(self, name, help_text, function=None):
+        self.name = name
+        self.help = help_text
+        self.function = function
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def render(self):
+        value = self.function() if self.function is not None else self.value
+        yield f"{self.name} {_format_value(value)}"
+
+
+class Gauge:
+    """Value that goes up and down, set by the owner or read from a function at render time."""
+
+    def __init__(self, name, help_text, function=None):
+        self.name = name
+        self.help = help_text
+        self.function = function
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def render(self):
+        value = self.function() if self.function is not None else self.value
+        yield f"{self.name} {_format_value(value)}"
+
+
+class Histogram:
+    """Fixed-bucket histogram, observe() is a bisect and two additions."""
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.bounds = tuple(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def render(self):
+        counts = list(self.counts)
+        total = 0
+        for bound, count in zip(self.bounds, counts):
+            total += count
+            yield f'{self.name}_bucket{{le="{bound}"}} {total}'
+        total += counts[-1]
+        yield f'{self.name}_bucket{{le="+Inf"}} {total}'
+        yield f"{self.name}_sum {self.sum!r}"
+        yield f"{self.name}_count {total}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _add(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, function=None):
+        return self._add(Counter(name, help_text, function))
+
+    def gauge(self, name, help_text, function=None):
+        return self._add(Gauge(name, help_text, function))
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help_text, buckets))
+
+    def render(self):
+        lines = []
+        for metric in list(self._metrics.values()):
+            try:
+                samples = list(metric.render())
+            except Exception as e:  # a broken gauge function must not stop the others
+                print(f"Error: Could not render metric {metric.name}: {e}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {type(metric).__name__.lower()}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+# The kiosk's metrics, imported by whichever script is running
+REGISTRY = Registry()
+
+
+class MetricsPublisher:
+    """Writes registry.render() to path every interval seconds from its own thread."""
+
+    def __init__(self, registry, path, interval=1.0):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stop = Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = Thread(target=self._run, name="metrics-publisher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        # Don't leave numbers behind that look live
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                write_atomic(self.path, self.registry.render().encode(), fsync="never")
+            except OSError as e:
+                print(f"Error: Could not publish metrics to {self.path}: {e}")
+                self._stop.wait(30)
+            self._stop.wait(self.interval)
+
+
+def read_published(path, max_age=10.0):
+    """Return the published metrics text plus photo_kiosk_up/_age, for server.py.
+
+    The kiosk counts as down when the file is missing or older than max_age.
+    """
+    try:
+        with open(path) as f:
+            text = f.read()
+        age = time.time() - os.stat(path).st_mtime
+    except OSError:
+        text, age = "", None
+
+    up = age is not None and age <= max_age
+    lines = [
+        "# HELP photo_kiosk_up Whether the kiosk published metrics recently",
+        "# TYPE photo_kiosk_up gauge",
+        f"photo_kiosk_up {int(up)}",
+    ]
+    if age is not None:
+        lines += [
+            "# HELP photo_kiosk_metrics_age_seconds Age of the published metrics",
+            "# TYPE photo_kiosk_metrics_age_seconds gauge",
+            f"photo_kiosk_metrics_age_seconds {age:.3f}",
+        ]
+    return (text if up else "") + "\n".join(lines) + "\n"
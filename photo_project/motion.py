@@ -0,0 +1,62 @@
+import cv2
+import numpy as np
+
+
+class MotionDetector:
+    """Frame differencing against a running background, on a tiny grayscale copy.
+
+    Each frame is shrunk to size (64x48 by default) before anything else, so
+    the cost is the same for any camera resolution. The frame's overall
+    brightness is matched to the background before differencing, so
+    flicker, auto exposure or a light switching on don't count as motion.
+    Motion is reported once more than min_area of the pixels differ by more
+    than threshold grey levels for `frames` frames in a row, which also
+    ignores single noisy frames. The background follows the scene with
+    weight alpha per frame.
+    """
+
+    def __init__(self, size=(64, 48), threshold=25, min_area=0.02, frames=2, alpha=0.05):
+        self.size = size
+        self.threshold = threshold
+        self.min_area = min_area
+        self.frames = frames
+        self.alpha = alpha
+
+        self._small = np.empty((size[1], size[0], 3), np.uint8)
+        self._gray = np.empty((size[1], size[0]), np.uint8)
+        self._current = np.empty((size[1], size[0]), np.float32)
+        self._diff = np.empty((size[1], size[0]), np.float32)
+        self._background = None
+        self._hits = 0
+
+        # Share of changed pixels in the last frame, for tuning min_area
+        self.area = 0.0
+
+    def reset(self):
+        """Forget the background, the next frame becomes the new one."""
+        self._background = None
+        self._hits = 0
+        self.area = 0.0
+
+    def update(self, frame):
+        """Feed a BGR frame, returns True when motion is detected."""
+        cv2.resize(frame, self.size, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        cv2.GaussianBlur(self._gray, (5, 5), 0, dst=self._gray)
+        self._current[:] = self._gray
+
+        if self._background is None:
+            self._background = self._current.copy()
+            return False
+
+        # Global brightness change is lighting, not motion
+        mean = float(self._current.mean())
+        if mean > 1:
+            self._current *= float(self._background.mean()) / mean
+
+        cv2.absdiff(self._current, self._background, dst=self._diff)
+        self.area = np.count_nonzero(self._diff > self.threshold) / self._diff.size
+        cv2.accumulateWeighted(self._current, self._background, self.alpha)
+
+        self._hits = self._hits + 1 if self.area > self.min_area else 0
+        return self._hits >= self.frames
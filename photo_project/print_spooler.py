@@ -0,0 +1,359 @@
+"""Print queue that survives restarts, worked off by one background thread.
+
+Every job is two files in the spool directory: the image and a small JSON
+file with its state, rewritten atomically on every change by the spooler
+thread (never by the UI, which only takes a short lock). On start the
+directory is read back, so jobs queued before a crash or power cut are
+still printed (a job that was printing at the time is sent again).
+
+The command is config.PRINT_COMMAND:
+
+    lp -n {copies} {path}       any command, {copies} and {path} are filled in per job
+    drop:/mnt/printer_inbox     stand-in that copies the file into a directory
+
+Job states: writing -> queued -> printing -> done, or failed once
+max_attempts runs failed (retry() queues it again), or cancelled.
+
+    python print_spooler.py [list | retry ID | cancel ID]
+
+inspects or changes the queue while the kiosk is not running.
+"""
+import argparse
+import glob
+import json
+import os
+import shlex
+import subprocess
+import time
+from collections import deque
+from threading import Thread, Condition
+
+import cv2
+
+import config
+from encoders import Encoder
+from writer import write_atomic
+
+ACTIVE_STATES = ("writing", "queued", "printing")
+FINISHED_STATES = ("done", "failed", "cancelled")
+
+
+class PrintCommand:
+    """Hands one file to the printer, see the module docstring for the spec."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.drop_dir = spec[len("drop:"):] if spec.startswith("drop:") else None
+        self.args = None if self.drop_dir is not None else shlex.split(spec)
+
+    def start(self, path, copies):
+        """Return a Popen for the job, or None when the job is already done (drop)."""
+        if self.drop_dir is not None:
+            os.makedirs(self.drop_dir, exist_ok=True)
+            name, ext = os.path.splitext(os.path.basename(path))
+            with open(path, "rb") as f:
+                write_atomic(os.path.join(self.drop_dir, f"{name}_x{copies}{ext}"), f.read())
+            return None
+        args = [arg.format(copies=copies, path=path) for arg in self.args]
+        return subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+
+
+class PrintSpooler:
+    """Queue of print jobs, see the module docstring.
+
+    submit() only hands the image to the spooler thread, which encodes and
+    writes it, so the UI never waits for the disk or the printer. Failed
+    runs are retried after retry_delay seconds (doubling each time) until
+    max_attempts; a run that takes longer than timeout is killed and
+    counts as failed. latency, if given, is a metrics.Histogram that gets
+    the time from submit() to the printer accepting the job.
+    """
+
+    def __init__(self, spool_dir, command="lp -n {copies} {path}", encoder="jpeg:quality=95",
+                 max_attempts=3, retry_delay=5.0, timeout=60.0, keep_finished=50, latency=None):
+        self.spool_dir = spool_dir
+        self.command = PrintCommand(command)
+        self.encoder = Encoder.from_spec(encoder)
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.keep_finished = keep_finished
+        self.latency = latency
+
+        self._cond = Condition()
+        self._jobs = {}
+        self._images = {}
+        self._order = deque()
+        self._dirty = set()
+        self._cancel_running = False
+        self._running = False
+        self._thread = None
+
+        self.printed = 0
+        self.failed = 0
+
+        os.makedirs(spool_dir, exist_ok=True)
+        self._load()
+
+    # --- persistence
+
+    def _json_path(self, job_id):
+        return os.path.join(self.spool_dir, f"job_{job_id:06d}.json")
+
+    def _flush(self):
+        """Write the JSON of every changed job, outside the lock."""
+        with self._cond:
+            jobs = [dict(self._jobs[job_id]) for job_id in self._dirty if job_id in self._jobs]
+            self._dirty.clear()
+        for job in jobs:
+            try:
+                write_atomic(self._json_path(job["id"]), json.dumps(job).encode(), fsync="file")
+            except OSError as e:
+                print(f"Error: Could not save print job {job['id']}: {e}")
+
+    def _load(self):
+        for path in sorted(glob.glob(os.path.join(self.spool_dir, "job_*.json"))):
+            try:
+                with open(path) as f:
+                    job = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error: Skipping unreadable print job {path}: {e}")
+                continue
+            if job["state"] == "writing":
+                # The image never made it to disk, nothing to print
+                job["state"], job["error"] = "failed", "interrupted before the image was written"
+            elif job["state"] == "printing":
+                job["state"] = "queued"
+            self._jobs[job["id"]] = job
+            if job["state"] == "queued":
+                self._order.append(job["id"])
+        self._next_id = max(self._jobs, default=0) + 1
+
+    def _prune(self):
+        finished = [job_id for job_id in sorted(self._jobs) if self._jobs[job_id]["state"] in FINISHED_STATES]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            job = self._jobs.pop(job_id)
+            for path in (job.get("image"), self._json_path(job_id)):
+                try:
+                    if path:
+                        os.remove(path)
+                except OSError:
+                    pass
+
+    # --- called from the UI
+
+    def submit(self, image, copies=1):
+        """Queue image (not modified afterwards by the caller) for printing, returns the job id."""
+        with self._cond:
+            job_id = self._next_id
+            self._next_id += 1
+            self._jobs[job_id] = {
+                "id": job_id, "state": "writing", "copies": copies, "image": None, "attempts": 0,
+                "error": None, "printer_job": None, "created": time.time(), "updated": time.time(),
+                "not_before": 0.0,
+            }
+            self._images[job_id] = image
+            self._cond.notify()
+        return job_id
+
+    def jobs(self):
+        """Copies of all known jobs, oldest first."""
+        with self._cond:
+            return [dict(self._jobs[job_id]) for job_id in sorted(self._jobs)]
+
+    def job(self, job_id):
+        """Copy of the job's state, or None if it is unknown."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def position(self, job_id):
+        """Number of jobs that will print before job_id."""
+        with self._cond:
+            waiting = [i for i, job in self._jobs.items() if job["state"] in ACTIVE_STATES]
+            return sum(1 for i in waiting if i < job_id)
+
+    @property
+    def pending(self):
+        """Jobs not finished yet."""
+        with self._cond:
+            return sum(1 for job in self._jobs.values() if job["state"] in ACTIVE_STATES)
+
+    def counts(self):
+        with self._cond:
+            result = dict.fromkeys(ACTIVE_STATES + FINISHED_STATES, 0)
+            for job in self._jobs.values():
+                result[job["state"]] += 1
+            return result
+
+    def cancel(self, job_id):
+        """Cancel a waiting job, or kill the command of the one printing. Returns False if too late."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job["state"] not in ACTIVE_STATES:
+                return False
+            if job["state"] == "printing":
+                self._cancel_running = True
+                return True
+            self._finish(job, "cancelled")
+            self._images.pop(job_id, None)
+            self._cond.notify()
+            return True
+
+    def retry(self, job_id):
+        """Queue a failed job again with a fresh set of attempts."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job["state"] != "failed" or not job["image"]:
+                return False
+            job.update(state="queued", attempts=0, error=None, not_before=0.0, updated=time.time())
+            self._dirty.add(job_id)
+            self._order.append(job_id)
+            self._cond.notify()
+            return True
+
+    # --- worker
+
+    def start(self):
+        if self._thread is None:
+            self._running = True
+            self._thread = Thread(target=self._run, name="print-spooler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        """Stop the thread, everything still queued (or printing, if it doesn't finish in time) is printed on the next start."""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _finish(self, job, state, error=None):
+        job.update(state=state, error=error, updated=time.time())
+        self._dirty.add(job["id"])
+
+    def _run(self):
+        while True:
+            self._flush()
+            with self._cond:
+                # New images are written first, they are what a guest is waiting for. They only
+                # exist in memory, so they are still written after stop()
+                intake = next((i for i in self._images if self._jobs[i]["state"] == "writing"), None)
+                if not self._running and intake is None:
+                    return
+                job_id = self._next_ready() if intake is None else None
+                if intake is None and job_id is None:
+                    if not self._dirty:
+                        self._cond.wait(timeout=self._wait_time())
+                    continue
+                if intake is not None:
+                    image = self._images.pop(intake)
+                else:
+                    job = self._jobs[job_id]
+                    job.update(state="printing", attempts=job["attempts"] + 1, updated=time.time())
+                    self._dirty.add(job_id)
+                    self._cancel_running = False
+
+            if intake is not None:
+                self._write_image(intake, image)
+            else:
+                self._flush()
+                self._print(job_id)
+
+    def _next_ready(self):
+        now = time.time()
+        for job_id in list(self._order):
+            job = self._jobs.get(job_id)
+            if job is None or job["state"] != "queued":
+                self._order.remove(job_id)
+            elif job["not_before"] <= now:
+                self._order.remove(job_id)
+                return job_id
+        return None
+
+    def _wait_time(self):
+        retry_times = [self._jobs[i]["not_before"] for i in self._order if i in self._jobs]
+        return max(0.05, min(retry_times) - time.time()) if retry_times else None
+
+    def _write_image(self, job_id, image):
+        path = os.path.join(self.spool_dir, f"job_{job_id:06d}{self.encoder.ext}")
+        try:
+            write_atomic(path, self.encoder.encode(image), fsync="file")
+        except (OSError, ValueError, cv2.error) as e:
+            with self._cond:
+                self._finish(self._jobs[job_id], "failed", f"could not write the image: {e}")
+                self.failed += 1
+            return
+        with self._cond:
+            job = self._jobs[job_id]
+            job["image"] = path
+            if job["state"] == "writing":
+                job.update(state="queued", updated=time.time())
+                self._order.append(job_id)
+            self._dirty.add(job_id)
+
+    def _print(self, job_id):
+        with self._cond:
+            job = dict(self._jobs[job_id])
+        error, output = None, ""
+        start = time.monotonic()
+        try:
+            proc = self.command.start(job["image"], job["copies"])
+            while proc is not None:
+                try:
+                    output, _ = proc.communicate(timeout=0.2)
+                    if proc.returncode != 0:
+                        error = f"{self.command.spec.split()[0]} exited with {proc.returncode}: {output.strip()}"
+                    break
+                except subprocess.TimeoutExpired:
+                    if self._cancel_running or time.monotonic() - start > self.timeout:
+                        proc.kill()
+                        proc.communicate()
+                        error = "cancelled" if self._cancel_running else f"timed out after {self.timeout:.0f} s"
+                        break
+        except OSError as e:
+            error = str(e)
+
+        with self._cond:
+            job = self._jobs[job_id]
+            if error == "cancelled":
+                self._finish(job, "cancelled")
+            elif error is None:
+                job["printer_job"] = output.strip() or None
+                self._finish(job, "done")
+                self.printed += 1
+                if self.latency is not None:
+                    self.latency.observe(time.time() - job["created"])
+            elif job["attempts"] >= self.max_attempts:
+                print(f"Error: Print job {job_id} failed: {error}")
+                self._finish(job, "failed", error)
+                self.failed += 1
+            else:
+                job["not_before"] = time.time() + self.retry_delay * 2 ** (job["attempts"] - 1)
+                self._finish(job, "queued", error)
+                self._order.append(job_id)
+            self._prune()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the print queue while the kiosk is stopped")
+    parser.add_argument("action", nargs="?", default="list", choices=("list", "retry", "cancel"))
+    parser.add_argument("job", nargs="?", type=int)
+    args = parser.parse_args()
+
+    spooler = PrintSpooler(config.PRINT_SPOOL_DIR, config.PRINT_COMMAND)
+    if args.action == "list":
+        for job in spooler.jobs():
+            created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(job["created"]))
+            print(f"{job['id']:6d}  {created}  {job['state']:<9}  x{job['copies']}  {job['error'] or ''}")
+    elif args.job is None:
+        parser.error(f"{args.action} needs a job id")
+    elif not (spooler.retry(args.job) if args.action == "retry" else spooler.cancel(args.job)):
+        print(f"Job {args.job} can't be {'retried' if args.action == 'retry' else 'cancelled'} in its current state")
+    spooler._flush()
+
+
+if __name__ == "__main__":
+    main()
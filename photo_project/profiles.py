@@ -0,0 +1,165 @@
+"""Performance profiles for the kiosk, chosen with inter.py --profile NAME.
+
+Each profile replaces one of the old script variants:
+
+    desktop   inter.py                  portrait 900x1200 crop, 30 fps
+    pi        optimized_for_pi.py       1440 wide crop, half size preview, 10 fps, JPEG merges
+    wide      xyissuesolved.py          1440 wide crop, 30 fps
+    low_res   less_resolution_inter.py  480x640 preview with full resolution stills (config.CAPTURE_MODE)
+    low_fps   slow_optimized_lowfps.py  camera at 640x480, 10 fps
+
+"auto" measures this machine once (camera frame rate, crop/resize and
+border blend cost, canvas blit cost) and picks the largest preview and
+highest fps that fit in the frame budget, on top of "desktop". The result
+is cached per device in config.CALIBRATION_CACHE, so later starts skip the
+measuring; --recalibrate forces a new run.
+"""
+import json
+import os
+import platform
+import time
+
+import cv2
+
+import config
+from compositing import ScaledCompositor
+from geometry import FramePlanner
+from writer import write_atomic
+
+PROFILES = {
+    "desktop": dict(camera_size=None, crop="portrait", capture_mode=None, fps=config.TARGET_FPS, preview_scale=1.0,
+                    interpolation=config.DISPLAY_INTERPOLATION, merge_encoder=config.MERGE_ENCODER),
+    "pi": dict(camera_size=None, crop=1440, capture_mode=None, fps=config.PI_TARGET_FPS, preview_scale=0.5,
+               interpolation=config.DISPLAY_INTERPOLATION, merge_encoder=config.PI_MERGE_ENCODER),
+    "wide": dict(camera_size=None, crop=1440, capture_mode=None, fps=config.TARGET_FPS, preview_scale=1.0,
+                 interpolation=config.DISPLAY_INTERPOLATION, merge_encoder=config.MERGE_ENCODER),
+    "low_res": dict(camera_size=None, crop=None, capture_mode=config.CAPTURE_MODE, fps=config.TARGET_FPS, preview_scale=1.0,
+                    interpolation=config.DISPLAY_INTERPOLATION, merge_encoder=config.MERGE_ENCODER),
+    "low_fps": dict(camera_size=(640, 480), crop=None, capture_mode=None, fps=10, preview_scale=1.0,
+                    interpolation=config.DISPLAY_INTERPOLATION, merge_encoder=config.MERGE_ENCODER),
+}
+PROFILE_NAMES = ("auto",) + tuple(PROFILES)
+
+# What "auto" may pick, best first
+PREVIEW_SCALES = (1.0, 0.75, 0.5)
+FPS_CHOICES = (30, 24, 20, 15, 10)
+
+
+def make_planner(crop):
+    """Live FramePlanner for a profile's crop: "portrait", a crop width, or None for the whole frame."""
+    if crop == "portrait":
+        return FramePlanner(out_size=(900, 1200))
+    return FramePlanner(crop_width=crop)
+
+
+def device_key(source, canvas_size):
+    """What a calibration depends on: the board, the camera, the screen and the OpenCV build."""
+    try:
+        with open("/proc/device-tree/model") as f:
+            model = f.read().strip("\0\n ")
+    except OSError:
+        model = platform.processor() or platform.machine()
+    return f"{model}|{platform.node()}|{source}|{canvas_size[0]}x{canvas_size[1]}|opencv {cv2.__version__}"
+
+
+def _median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def calibrate(reader, display, border, seconds=1.5, budget=0.7, repeats=9):
+    """Measure this machine and return the settings "auto" adds to the desktop profile.
+
+    reader must be running and display must be on a mapped canvas. The
+    frame cost is crop/resize + border blend + blit, and the Tk thread may
+    spend `budget` of each frame period on it; the rest is left for input
+    and everything else on the Tk thread.
+    """
+    deadline = time.monotonic() + 5
+    while reader.latest() is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    latest = reader.latest()
+    if latest is None:
+        raise RuntimeError("No camera frames to calibrate with")
+
+    start_count, start = reader.frames_captured, time.monotonic()
+    time.sleep(seconds)
+    camera_fps = (reader.frames_captured - start_count) / (time.monotonic() - start)
+    frame = reader.latest()[2]
+
+    planner = make_planner("portrait")
+    compositor = ScaledCompositor()
+    original = display.scale, display.interpolation
+    measured = {}
+    choice = None
+    try:
+        for interpolation in (config.DISPLAY_INTERPOLATION, cv2.INTER_NEAREST):
+            display.interpolation = interpolation
+            for scale in PREVIEW_SCALES:
+                display.scale = scale
+                process_times, blit_times = [], []
+                for _ in range(repeats):
+                    t0 = time.perf_counter()
+                    preview = display.fit(planner.process(frame))
+                    compositor.get(border, (preview.shape[1], preview.shape[0])).apply(preview, dst=preview)
+                    process_times.append(time.perf_counter() - t0)
+                    display.show(preview)
+                    blit_times.append(display.blit_time)
+                cost = _median(process_times) + _median(blit_times)
+                measured[f"{scale}/{interpolation}"] = round(cost * 1000, 2)
+
+                for fps in FPS_CHOICES:
+                    if fps <= camera_fps * 1.05 and cost * fps <= budget:
+                        choice = dict(fps=fps, preview_scale=scale, interpolation=interpolation)
+                        break
+                if choice is not None:
+                    break
+            if choice is not None:
+                break
+    finally:
+        display.scale, display.interpolation = original
+
+    if choice is None:
+        choice = dict(fps=FPS_CHOICES[-1], preview_scale=PREVIEW_SCALES[-1], interpolation=cv2.INTER_NEAREST)
+    choice["calibration"] = dict(camera_fps=round(camera_fps, 1), frame_ms=measured,
+                                 date=time.strftime("%Y-%m-%d %H:%M:%S"))
+    return choice
+
+
+def _load_cache(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def resolve_profile(name, reader, display, border, source, recalibrate=False, cache_path=None):
+    """Return the settings dict for profile name, calibrating (or using the cache) for "auto"."""
+    if name != "auto":
+        return dict(PROFILES[name])
+
+    cache_path = cache_path or config.CALIBRATION_CACHE
+    key = device_key(source, display.canvas_size)
+    cache = _load_cache(cache_path)
+    if key in cache and not recalibrate:
+        result = cache[key]
+        print(f"Using calibration from {result['calibration']['date']}: {result['fps']} fps, "
+              f"preview scale {result['preview_scale']} (--recalibrate to measure again)")
+        return dict(PROFILES["desktop"], **result)
+
+    print("Calibrating this device, takes a few seconds...")
+    try:
+        result = calibrate(reader, display, border)
+    except RuntimeError as e:
+        print(f"Error: Calibration failed ({e}), using the desktop profile")
+        return dict(PROFILES["desktop"])
+    print(f"Calibration: camera {result['calibration']['camera_fps']} fps, frame cost {result['calibration']['frame_ms']} ms"
+          f" -> {result['fps']} fps at preview scale {result['preview_scale']}")
+    cache[key] = result
+    try:
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        write_atomic(cache_path, json.dumps(cache, indent=2).encode())
+    except OSError as e:
+        print(f"Error: Could not cache calibration in {cache_path}: {e}")
+    return dict(PROFILES["desktop"], **result)
@@ -0,0 +1,286 @@
+"""Keeps the photo directories within their quotas so the card never fills up.
+
+A background thread looks at the directories every `interval` seconds and
+deletes, oldest first:
+
+  1. anything older than max_age_days,
+  2. while over max_bytes or max_files (all directories together), or while
+     the disk has less than min_free_bytes free: raw captures first, merges
+     only once no capture is left to delete.
+
+Files younger than keep_seconds are never touched, so the photos of the
+current guest stay. Deleting happens in batches of `batch` files with a
+pause in between, and waits while busy() says a photo is being saved. The
+thread runs at the lowest CPU and idle I/O priority where Linux allows it.
+
+status is None, "warning" or "critical" depending on the free space, for
+the kiosk to show before a save fails.
+
+With cache_dir, the gallery's smaller copies (see gallery.py, named by the
+SHA-1 of their original) go too once no photo left has that hash. The
+hashes come from the catalog, files it doesn't know are hashed once.
+"""
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import platform
+import shutil
+import sqlite3
+import threading
+import time
+from threading import Thread, Event
+
+# ioprio_set(IOPRIO_WHO_PROCESS, tid, IOPRIO_CLASS_IDLE << 13), syscall numbers from <asm/unistd.h>
+_IOPRIO_SET = {"x86_64": 251, "aarch64": 30, "armv7l": 314, "armv6l": 314, "i686": 289}
+_IOPRIO_CLASS_IDLE = 3
+
+
+def lower_thread_priority():
+    """Lowest CPU and idle I/O priority for the calling thread, where supported. Returns True if I/O priority was set."""
+    tid = threading.get_native_id()
+    try:
+        os.setpriority(os.PRIO_PROCESS, tid, 19)
+    except (AttributeError, OSError):
+        pass
+    number = _IOPRIO_SET.get(platform.machine())
+    libc_name = ctypes.util.find_library("c")
+    if number is None or libc_name is None:
+        return False
+    libc = ctypes.CDLL(libc_name, use_errno=True)
+    return libc.syscall(number, 1, tid, _IOPRIO_CLASS_IDLE << 13) == 0
+
+
+class RetentionManager:
+    """Deletes old photos to stay within quota, see the module docstring.
+
+    directories are deleted from in the order given (captures before
+    merges). Limits that are None are not enforced. catalog_path, if given,
+    is the catalog.py database; rows of deleted files are removed from it.
+    cache_dir, if given, is the gallery cache of these directories.
+    """
+
+    def __init__(self, directories, max_bytes=None, max_files=None, max_age_days=None, min_free_bytes=None,
+                 warn_free_bytes=None, critical_free_bytes=None, keep_seconds=3600, interval=60.0,
+                 batch=20, pause=0.5, busy=None, catalog_path=None, cache_dir=None):
+        self.directories = list(directories)
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.max_age_days = max_age_days
+        self.min_free_bytes = min_free_bytes
+        self.warn_free_bytes = warn_free_bytes
+        self.critical_free_bytes = critical_free_bytes
+        self.keep_seconds = keep_seconds
+        self.interval = interval
+        self.batch = batch
+        self.pause = pause
+        self.busy = busy or (lambda: False)
+        self.catalog_path = catalog_path
+        self.cache_dir = cache_dir
+
+        self._stop = Event()
+        self._thread = None
+        self._hashes = {}
+        self._cache_checked = False
+
+        self.status = None
+        self.free_bytes = 0
+        self.used_bytes = 0
+        self.files = 0
+        self.deleted = 0
+        self.deleted_bytes = 0
+        self.cache_deleted = 0
+        try:
+            self._check_free()
+        except OSError:
+            pass
+
+    def start(self):
+        if self._thread is None:
+            self._thread = Thread(target=self._run, name="retention", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    @property
+    def message(self):
+        """What to show on screen for the current status, or None."""
+        if self.status is None:
+            return None
+        free = f"{self.free_bytes / 1e9:.1f} GB" if self.free_bytes >= 1e9 else f"{self.free_bytes / 1e6:.0f} MB"
+        if self.status == "critical":
+            return f"Disk almost full ({free} free), photos may not be saved"
+        return f"Disk space low ({free} free)"
+
+    def _run(self):
+        lower_thread_priority()
+        while True:
+            try:
+                self.enforce()
+            except OSError as e:
+                print(f"Error: Retention check failed: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+    def _check_free(self):
+        self.free_bytes = shutil.disk_usage(self.directories[0]).free
+        if self.critical_free_bytes is not None and self.free_bytes < self.critical_free_bytes:
+            self.status = "critical"
+        elif self.warn_free_bytes is not None and self.free_bytes < self.warn_free_bytes:
+            self.status = "warning"
+        else:
+            self.status = None
+
+    def _scan(self):
+        """[(rank, mtime, size, path)] of every photo, in deletion order."""
+        files = []
+        for rank, directory in enumerate(self.directories):
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name.startswith("."):
+                    # Still being written
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((rank, stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+        return files
+
+    def plan(self):
+        """Paths to delete now, in order."""
+        self._check_free()
+        files = self._scan()
+        self.files = len(files)
+        self.used_bytes = sum(f[2] for f in files)
+
+        now = time.time()
+        protected = now - self.keep_seconds
+        expired = now - self.max_age_days * 86400 if self.max_age_days is not None else None
+
+        doomed = []
+        count, used, free = self.files, self.used_bytes, self.free_bytes
+        for rank, mtime, size, path in files:
+            if mtime > protected:
+                continue
+            over = ((self.max_bytes is not None and used > self.max_bytes)
+                    or (self.max_files is not None and count > self.max_files)
+                    or (self.min_free_bytes is not None and free < self.min_free_bytes))
+            if over or (expired is not None and mtime < expired):
+                doomed.append(path)
+                count -= 1
+                used -= size
+                free += size
+        return doomed
+
+    def enforce(self):
+        """Delete what plan() says, in batches. Returns the number of files deleted."""
+        doomed = self.plan()
+        removed = []
+        for start in range(0, len(doomed), self.batch):
+            while self.busy() and not self._stop.is_set():
+                self._stop.wait(self.pause)
+            if self._stop.is_set():
+                break
+            for path in doomed[start:start + self.batch]:
+                try:
+                    size = os.path.getsize(path)
+                    os.remove(path)
+                except OSError:
+                    continue
+                removed.append(path)
+                self.deleted += 1
+                self.deleted_bytes += size
+            self._stop.wait(self.pause)
+        if removed:
+            print(f"Retention: deleted {len(removed)} old photos")
+            self._uncatalog(removed)
+        if self.cache_dir is not None and (removed or not self._cache_checked) and not self._stop.is_set():
+            # Also once at start, for photos deleted while the kiosk wasn't running
+            self._prune_cache()
+            self._cache_checked = True
+        if removed:
+            self._check_free()
+        return len(removed)
+
+    def _uncatalog(self, paths):
+        if self.catalog_path is None or not os.path.exists(self.catalog_path):
+            return
+        try:
+            db = sqlite3.connect(self.catalog_path, timeout=10)
+            try:
+                with db:
+                    db.executemany("DELETE FROM files WHERE path = ?", [(os.path.abspath(p),) for p in paths])
+                    db.execute("DELETE FROM sessions WHERE id NOT IN (SELECT session_id FROM files)")
+            finally:
+                db.close()
+        except sqlite3.Error as e:
+            print(f"Error: Could not remove deleted photos from the catalog: {e}")
+
+    def _remaining_hashes(self):
+        """SHA-1 of every photo still in the directories."""
+        cataloged = {}
+        if self.catalog_path is not None and os.path.exists(self.catalog_path):
+            try:
+                db = sqlite3.connect(self.catalog_path, timeout=10)
+                try:
+                    cataloged = {path: (size, sha1) for path, size, sha1 in db.execute("SELECT path, size, sha1 FROM files")}
+                finally:
+                    db.close()
+            except sqlite3.Error as e:
+                print(f"Error: Could not read photo hashes from the catalog: {e}")
+        hashes = set()
+        known = {}
+        for _, mtime, size, path in self._scan():
+            row = cataloged.get(os.path.abspath(path))
+            if row is not None and row[0] == size:
+                hashes.add(row[1])
+                continue
+            key = (size, mtime)
+            cached = self._hashes.get(path)
+            if cached is None or cached[0] != key:
+                digest = hashlib.sha1()
+                try:
+                    with open(path, "rb") as f:
+                        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                            digest.update(chunk)
+                except OSError:
+                    continue
+                cached = (key, digest.hexdigest())
+            known[path] = cached
+            hashes.add(cached[1])
+        self._hashes = known
+        return hashes
+
+    def _prune_cache(self):
+        """Delete gallery copies of photos that are gone. Returns the number of files deleted."""
+        started = time.time()
+        keep = self._remaining_hashes()
+        count = 0
+        for directory, _, names in os.walk(self.cache_dir):
+            for name in names:
+                digest = name.split(".")[0]
+                if name.startswith(".") or len(digest) != 40 or digest in keep:
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    if os.path.getmtime(path) >= started:
+                        # Made for a photo saved after the scan
+                        continue
+                    os.remove(path)
+                except OSError:
+                    continue
+                count += 1
+        if count:
+            self.cache_deleted += count
+            print(f"Retention: deleted {count} gallery copies of deleted photos")
+        return count
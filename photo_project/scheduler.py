@@ -0,0 +1,226 @@
+import glob
+import os
+import time
+
+import cv2
+
+
+class QualityLevel:
+    """How much of the canvas the preview uses, how it is scaled, and what share of the target fps to aim for."""
+
+    def __init__(self, display_scale, interpolation, fps_factor):
+        self.display_scale = display_scale
+        self.interpolation = interpolation
+        self.fps_factor = fps_factor
+
+    def __repr__(self):
+        return f"QualityLevel({self.display_scale}, {self.interpolation}, {self.fps_factor})"
+
+
+def default_levels(interpolation=cv2.INTER_LINEAR, max_scale=1.0):
+    """Best first. Shrink the preview, then scale it with the cheapest filter, then show fewer frames.
+
+    Levels with a preview larger than max_scale are left out.
+    """
+    levels = [
+        QualityLevel(1.0, interpolation, 1.0),
+        QualityLevel(0.75, interpolation, 1.0),
+        QualityLevel(0.5, interpolation, 1.0),
+        QualityLevel(0.5, cv2.INTER_NEAREST, 1.0),
+        QualityLevel(0.5, cv2.INTER_NEAREST, 0.67),
+        QualityLevel(0.5, cv2.INTER_NEAREST, 0.5),
+    ]
+    return [level for level in levels if level.display_scale <= max_scale] or levels[-1:]
+
+
+class ThermalMonitor:
+    """Reads /sys/class/thermal at most every interval seconds.
+
+    throttled turns True when the hottest zone reaches limit degrees or a
+    CPU cooling device (not a fan) is active, and clears once the
+    temperature is back under clear. Where there is no thermal sysfs,
+    available is False and it never reports throttling.
+    """
+
+    def __init__(self, path="/sys/class/thermal", limit=80.0, clear=75.0, interval=2.0):
+        self.limit = limit
+        self.clear = clear
+        self.interval = interval
+        self._zones = sorted(glob.glob(os.path.join(path, "thermal_zone*", "temp")))
+        self._cooling = []
+        for device in sorted(glob.glob(os.path.join(path, "cooling_device*"))):
+            try:
+                with open(os.path.join(device, "type")) as f:
+                    kind = f.read().strip()
+            except OSError:
+                continue
+            if "fan" not in kind.lower():
+                self._cooling.append(os.path.join(device, "cur_state"))
+        self.available = bool(self._zones or self._cooling)
+
+        self.temperature = None
+        self.cooling_active = False
+        self.throttled = False
+        self._next_check = 0.0
+
+    @staticmethod
+    def _read_int(path):
+        try:
+            with open(path) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def check(self):
+        now = time.monotonic()
+        if not self.available or now < self._next_check:
+            return self.throttled
+        self._next_check = now + self.interval
+
+        temps = [t for t in map(self._read_int, self._zones) if t is not None]
+        self.temperature = max(temps) / 1000 if temps else None
+        self.cooling_active = any((self._read_int(p) or 0) > 0 for p in self._cooling)
+
+        hot = self.temperature is not None and self.temperature >= self.limit
+        cooled = self.temperature is None or self.temperature < self.clear
+        self.throttled = hot or self.cooling_active or (self.throttled and not cooled)
+        return self.throttled
+
+
+class FrameScheduler:
+    """Paces a root.after() loop to a target fps and adapts the quality level to keep up.
+
+    Call begin() at the top of the frame callback and reschedule with
+    root.after(scheduler.end(), callback). The delay is what is left of the
+    frame period after the work, so the loop runs at the target rate instead
+    of at period + work. lateness is how far after its deadline the callback
+    actually started. If the callback has to wait for the camera, it calls
+    begin() again on every retry; the wait is not counted as work and the
+    next deadline is one period after the frame arrived.
+
+    source_fps, if given, returns the rate the camera actually delivers (or
+    None); the target is capped to it, so a camera slower than fps doesn't
+    look like the kiosk falling behind.
+
+    A frame is missed when the lateness plus the work took longer than the
+    period. Every `window` frames: if more than a third were missed it steps
+    down one level, and if none were and the work used less
+    than half the budget of the level above, it steps back up. It won't step
+    up within `hold` seconds of the last change (twice that after a step up
+    that didn't last), nor while the thermal monitor reports throttling,
+    which also steps down once per hold.
+    """
+
+    def __init__(self, fps, levels=None, thermal=None, window=30, hold=5.0, on_change=None, lateness=None, source_fps=None):
+        self.fps = fps
+        self.source_fps = source_fps
+        self.levels = levels or default_levels()
+        self.thermal = thermal
+        self.window = window
+        self.base_hold = hold
+        self.hold = hold
+        self.on_change = on_change
+        self.lateness_histogram = lateness
+
+        self.level_index = 0
+        self.lateness = 0.0
+        self.work_time = 0.0
+        self.level_changes = 0
+
+        self._deadline = None
+        self._start = None
+        self._measured = False
+        self._waited = False
+        self._changed_at = time.monotonic()
+        self._last_step_up = None
+        self._frames = 0
+        self._misses = 0
+        self._work_sum = 0.0
+
+    @property
+    def level(self):
+        return self.levels[self.level_index]
+
+    @property
+    def period(self):
+        return self._period(self.level_index)
+
+    def _period(self, index):
+        fps = self.fps
+        if self.source_fps is not None:
+            fps = min(fps, self.source_fps() or fps)
+        return 1.0 / (fps * self.levels[index].fps_factor)
+
+    def reset(self):
+        """Forget the current deadline, e.g. after the loop was stopped for a while."""
+        self._deadline = None
+        self._start = None
+        self._measured = False
+        self._waited = False
+
+    def begin(self):
+        """Mark the start of the work. Can be called again if the callback retries before end()."""
+        now = time.perf_counter()
+        if self._start is not None:
+            self._waited = True
+        self._start = now
+        if self._deadline is not None and not self._measured:
+            self.lateness = max(0.0, now - self._deadline)
+            if self.lateness_histogram is not None:
+                self.lateness_histogram.observe(self.lateness)
+            self._measured = True
+
+    def end(self):
+        """Mark the end of the work and return the delay in ms until the next frame is due."""
+        now = time.perf_counter()
+        start = self._start if self._start is not None else now
+        period = self.period
+        self.work_time = now - start
+        late = self.lateness if self._measured else 0.0
+
+        # After waiting for the camera, pace from when the frame arrived rather than catching up
+        base = start if self._deadline is None or self._waited else self._deadline
+        deadline = base + period
+        self._frames += 1
+        self._work_sum += self.work_time
+        if late + self.work_time > period:
+            self._misses += 1
+        if self._frames >= self.window:
+            self._adapt()
+
+        if now - deadline > period:
+            # Far behind, start a new schedule rather than firing frames back to back
+            deadline = now
+        self._deadline = deadline
+        self._measured = False
+        self._waited = False
+        self._start = None
+        return max(1, int((deadline - now) * 1000))
+
+    def _adapt(self):
+        now = time.monotonic()
+        throttled = self.thermal is not None and self.thermal.check()
+        average = self._work_sum / self._frames
+        if self._misses * 3 > self._frames or (throttled and now - self._changed_at >= self.hold):
+            if self._last_step_up is not None and now - self._last_step_up < self.hold:
+                # The level above didn't hold, wait longer before trying it again
+                self.hold = min(self.hold * 2, 12 * self.base_hold)
+            self._set_level(self.level_index + 1)
+        elif (not self._misses and not throttled and self.level_index > 0 and now - self._changed_at >= self.hold
+              and average < 0.5 * self._period(self.level_index - 1)):
+            self._set_level(self.level_index - 1)
+            self._last_step_up = now
+        elif now - self._changed_at >= 4 * self.hold:
+            self.hold = self.base_hold
+        self._frames = self._misses = 0
+        self._work_sum = 0.0
+
+    def _set_level(self, index):
+        index = min(max(index, 0), len(self.levels) - 1)
+        if index == self.level_index:
+            return
+        self.level_index = index
+        self.level_changes += 1
+        self._changed_at = time.monotonic()
+        if self.on_change is not None:
+            self.on_change(self.level)
@@ -0,0 +1,123 @@
+import time
+
+CAMERA_MODES = ("release", "low_rate")
+
+
+class SleepController:
+    """Puts the kiosk to sleep after a period without activity, and wakes it again.
+
+    Asleep, the UI stops its frame loop (on_sleep) and the CameraReader
+    either closes the camera ("release", nothing runs at all) or reads one
+    frame every sample_interval seconds ("low_rate", the camera stays open
+    so waking is quicker and the frames can be watched for motion).
+
+    wake() resumes the reader and calls on_wake. The wake counts as done at
+    the first frame captured after it that reaches the screen, reported
+    through frame_shown(); wake_time is how long that took. If no frame
+    arrives within wake_timeout, the wake is finished anyway so the kiosk
+    can't hang behind the sleep screen. All methods run on the Tk thread.
+
+    With a motion.MotionDetector in "low_rate" mode, check() also feeds it
+    the sampled frames and wakes up when someone walks up to the booth.
+    sample_size lets the camera drop to a small mode while asleep, so it
+    doesn't spend the night decoding full resolution frames.
+    """
+
+    def __init__(self, reader, timeout=120, camera_mode="release", sample_interval=1.0,
+                 wake_timeout=5.0, on_sleep=None, on_wake=None, on_ready=None,
+                 detector=None, sample_size=None):
+        if camera_mode not in CAMERA_MODES:
+            raise ValueError(f"camera_mode must be one of {CAMERA_MODES}, not {camera_mode!r}")
+        if detector is not None and camera_mode != "low_rate":
+            raise ValueError("Motion wake needs camera_mode=\"low_rate\"")
+        self.reader = reader
+        self.timeout = timeout
+        self.camera_mode = camera_mode
+        self.sample_interval = sample_interval
+        self.wake_timeout = wake_timeout
+        self.on_sleep = on_sleep
+        self.on_wake = on_wake
+        self.on_ready = on_ready
+        self.detector = detector
+        self.sample_size = sample_size
+
+        self.asleep = False
+        self.wake_started = None
+        self.wake_time = None
+        self.wake_times = []
+        self.sleeps = 0
+        self.slept_seconds = 0.0
+        self.motion_wakes = 0
+        self._slept_at = None
+        self._awake_size = None
+        self._sample_seq = 0
+        self._woke_at = 0.0
+
+    @property
+    def waking(self):
+        return self.wake_started is not None
+
+    def check(self, last_activity_time):
+        """Call periodically with the time.time() of the last user activity."""
+        # A motion wake counts as activity, otherwise the kiosk would drop straight back to sleep
+        idle = time.time() - max(last_activity_time, self._woke_at)
+        if not self.asleep and not self.waking and idle > self.timeout:
+            self.sleep()
+        elif self.asleep and self.detector is not None:
+            latest = self.reader.latest(self._sample_seq)
+            if latest is not None:
+                self._sample_seq = latest[0]
+                if self.detector.update(latest[2]):
+                    self.motion_wakes += 1
+                    self.wake()
+        elif self.waking and time.monotonic() - self.wake_started > self.wake_timeout:
+            print(f"Error: No camera frame {self.wake_timeout:.0f} s after waking up")
+            self._ready(None)
+
+    def sleep(self):
+        if self.asleep:
+            return
+        self.asleep = True
+        self.sleeps += 1
+        self._slept_at = time.monotonic()
+        if self.camera_mode == "release":
+            self.reader.idle(release=True)
+        else:
+            self.reader.idle(interval=self.sample_interval)
+            if self.sample_size is not None:
+                self._awake_size = self.reader.resolution
+                self.reader.request_resolution(*self.sample_size)
+        if self.detector is not None:
+            self.detector.reset()
+            # Only frames read after this point, the camera may still be changing mode
+            latest = self.reader.latest()
+            self._sample_seq = latest[0] if latest is not None else 0
+        if self.on_sleep is not None:
+            self.on_sleep()
+
+    def wake(self):
+        if not self.asleep:
+            return
+        self.asleep = False
+        self._woke_at = time.time()
+        self.wake_started = time.monotonic()
+        self.slept_seconds += self.wake_started - self._slept_at
+        if self._awake_size is not None:
+            self.reader.request_resolution(*self._awake_size)
+            self._awake_size = None
+        self.reader.resume()
+        if self.on_wake is not None:
+            self.on_wake()
+
+    def frame_shown(self, frame_time=None):
+        """Report a redraw, frame_time being the CameraReader timestamp or None for a still (e.g. the review screen)."""
+        if self.waking and (frame_time is None or frame_time >= self.wake_started):
+            self._ready(time.monotonic() - self.wake_started)
+
+    def _ready(self, wake_time):
+        self.wake_started = None
+        if wake_time is not None:
+            self.wake_time = wake_time
+            self.wake_times.append(wake_time)
+        if self.on_ready is not None:
+            self.on_ready(wake_time)
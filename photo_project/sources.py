@@ -0,0 +1,247 @@
+"""Frame sources the kiosk can read from instead of a hard-coded cv2.VideoCapture(0).
+
+A source is given as a spec string (see config.CAMERA_SOURCE):
+
+    camera:0                          live OpenCV device 0 (a bare "0" works too)
+    file:session.avi?fps=30           video file, looped, replayed at 30 fps
+    file:frames/*.jpg?loop=0          image sequence (glob or directory), played once
+    synthetic:1920x1080?fps=30        generated test pattern
+
+fps=0 reads as fast as possible, which is what the benchmarks want. Every
+source has the small part of the cv2.VideoCapture interface the kiosk uses
+(read, set, get, isOpened, release), so CameraReader works with all of them.
+
+Record a session from any source for later replay:
+
+    python sources.py camera:0 --record session.avi --seconds 30
+"""
+import argparse
+import glob
+import os
+import time
+from urllib.parse import parse_qsl
+
+import cv2
+import numpy as np
+
+
+class FrameSource:
+    """Base for the non-camera sources: pacing to a fixed fps and camera-like set()/get()."""
+
+    def __init__(self, fps=0):
+        self.fps = fps
+        self.size = None
+        self._next_time = None
+        self._opened = True
+
+    def isOpened(self):
+        return self._opened
+
+    def release(self):
+        self._opened = False
+
+    def set(self, prop, value):
+        width, height = self.size or self.native_size()
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            self.size = (int(value), height)
+        elif prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            self.size = (width, int(value))
+        elif prop == cv2.CAP_PROP_FPS:
+            self.fps = value
+        else:
+            return False
+        return True
+
+    def get(self, prop):
+        width, height = self.size or self.native_size()
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(height)
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        return 0.0
+
+    def read(self):
+        if not self._opened:
+            return False, None
+        self._pace()
+        frame = self.next_frame()
+        if frame is None:
+            return False, None
+        if self.size is not None and (frame.shape[1], frame.shape[0]) != self.size:
+            frame = cv2.resize(frame, self.size)
+        return True, frame
+
+    def _pace(self):
+        if not self.fps:
+            return
+        now = time.monotonic()
+        if self._next_time is None or now - self._next_time > 1.0:
+            # First frame, or we fell far behind: restart the schedule instead of bursting
+            self._next_time = now
+        elif self._next_time > now:
+            time.sleep(self._next_time - now)
+        self._next_time += 1.0 / self.fps
+
+    def native_size(self):
+        raise NotImplementedError
+
+    def next_frame(self):
+        raise NotImplementedError
+
+
+class FileSource(FrameSource):
+    """Video file or image sequence, optionally looping."""
+
+    def __init__(self, path, fps=None, loop=True):
+        self.loop = loop
+        self._video = None
+        self._images = []
+        self._index = 0
+
+        if os.path.isdir(path):
+            path = os.path.join(path, "*")
+        if any(c in path for c in "*?["):
+            exts = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+            self._images = sorted(p for p in glob.glob(path) if p.lower().endswith(exts))
+            if not self._images:
+                raise FileNotFoundError(f"No images match {path}")
+            first = cv2.imread(self._images[0])
+            self._native = (first.shape[1], first.shape[0])
+            default_fps = 30
+        else:
+            self._video = cv2.VideoCapture(path)
+            if not self._video.isOpened():
+                raise FileNotFoundError(f"Could not open video {path}")
+            self._native = (int(self._video.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self._video.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            default_fps = self._video.get(cv2.CAP_PROP_FPS) or 30
+
+        super().__init__(default_fps if fps is None else fps)
+
+    def native_size(self):
+        return self._native
+
+    def next_frame(self):
+        if self._video is not None:
+            ret, frame = self._video.read()
+            if not ret and self.loop:
+                self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ret, frame = self._video.read()
+            return frame if ret else None
+
+        if self._index >= len(self._images):
+            if not self.loop:
+                return None
+            self._index = 0
+        frame = cv2.imread(self._images[self._index])
+        self._index += 1
+        return frame
+
+    def release(self):
+        super().release()
+        if self._video is not None:
+            self._video.release()
+
+
+class SyntheticSource(FrameSource):
+    """Moving colour pattern with a bouncing block, handy for profiling without a camera."""
+
+    def __init__(self, width=1280, height=720, fps=30):
+        super().__init__(fps)
+        self.size = (width, height)
+        self._pattern = None
+        self._frame_no = 0
+
+    def native_size(self):
+        return self.size
+
+    def next_frame(self):
+        width, height = self.size
+        if self._pattern is None or self._pattern.shape[:2] != (height, 2 * width):
+            # Twice as wide as a frame so each frame is just a shifted window into it. Built
+            # at 1/8 scale and upscaled so a 4K pattern doesn't need big float temporaries
+            x = np.linspace(0, 4 * np.pi, max(2 * width // 8, 2), dtype=np.float32)[None, :]
+            y = np.linspace(0, 1, max(height // 8, 2), dtype=np.float32)[:, None]
+            channels = [127 + 100 * np.sin(x + 2 * np.pi * c / 3) * (0.5 + 0.5 * y) for c in range(3)]
+            small = np.dstack(np.broadcast_arrays(*channels)).astype(np.uint8)
+            self._pattern = cv2.resize(small, (2 * width, height), interpolation=cv2.INTER_LINEAR)
+
+        offset = (self._frame_no * 4) % width
+        frame = self._pattern[:, offset:offset + width].copy()
+
+        block = max(min(width, height) // 8, 1)
+        bx = abs((self._frame_no * 7) % (2 * (width - block)) - (width - block))
+        by = abs((self._frame_no * 5) % (2 * (height - block)) - (height - block))
+        frame[by:by + block, bx:bx + block] = 255
+
+        self._frame_no += 1
+        return frame
+
+
+def open_source(spec):
+    """Open a source from its spec string, see the module docstring."""
+    spec = str(spec).strip()
+    kind, sep, rest = spec.partition(":")
+    if not sep:
+        kind, rest = "camera", spec
+    rest, _, query = rest.partition("?")
+    options = dict(parse_qsl(query))
+
+    if kind == "camera":
+        return cv2.VideoCapture(int(rest or 0))
+    if kind == "file":
+        fps = float(options["fps"]) if "fps" in options else None
+        return FileSource(rest, fps=fps, loop=options.get("loop", "1") != "0")
+    if kind == "synthetic":
+        width, _, height = (rest or "1280x720").partition("x")
+        return SyntheticSource(int(width), int(height), fps=float(options.get("fps", 30)))
+    raise ValueError(f"Unknown frame source {spec!r}")
+
+
+def record(source, path, seconds, fps):
+    """Write frames from source to a MJPG .avi for replay with file:path."""
+    writer = None
+    end = time.monotonic() + seconds
+    frames = 0
+    while time.monotonic() < end:
+        ret, frame = source.read()
+        if not ret:
+            break
+        if writer is None:
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (frame.shape[1], frame.shape[0]))
+        writer.write(frame)
+        frames += 1
+    if writer is not None:
+        writer.release()
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check or record a frame source")
+    parser.add_argument("source", help="source spec, e.g. camera:0 or synthetic:1920x1080")
+    parser.add_argument("--record", help="write the frames to this .avi file")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--fps", type=float, default=30, help="frame rate stored in the recording")
+    args = parser.parse_args()
+
+    source = open_source(args.source)
+    if not source.isOpened():
+        print(f"Error: Could not open {args.source}")
+        return
+    try:
+        if args.record:
+            frames = record(source, args.record, args.seconds, args.fps)
+            print(f"Recorded {frames} frames to {args.record}")
+        else:
+            ret, frame = source.read()
+            if ret:
+                print(f"{args.source}: {frame.shape[1]}x{frame.shape[0]}")
+            else:
+                print(f"Error: No frame from {args.source}")
+    finally:
+        source.release()
+
+
+if __name__ == "__main__":
+    main()
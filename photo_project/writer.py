@@ -0,0 +1,140 @@
+import atexit
+import hashlib
+import os
+import queue
+import sqlite3
+import time
+from threading import Thread
+
+import cv2
+
+FSYNC_POLICIES = ("never", "file", "always")
+
+
+def write_atomic(path, data, fsync="file"):
+    """Write bytes to a temp file next to path and rename it into place.
+
+    fsync is one of FSYNC_POLICIES: "file" syncs the data before the rename,
+    "always" also syncs the directory so the rename itself survives a power cut.
+    """
+    directory = os.path.dirname(path) or "."
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        if fsync != "never":
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    if fsync == "always":
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class ImageWriter:
+    """One persistent thread that encodes and writes images handed over by the UI.
+
+    The queue is bounded: when the card can't keep up, submit() blocks until
+    there is room rather than dropping a photo, and `busy` turns True a little
+    earlier so the UI can warn about it. close() waits for everything still
+    queued, and is also registered with atexit. latency, if given, is a
+    metrics.Histogram that gets the time from submit() to the file being in
+    place. catalog, if given, is a catalog.Catalog that gets a row for every
+    file submitted with a record, committed whenever the queue runs empty.
+    """
+
+    def __init__(self, maxsize=8, fsync="file", latency=None, catalog=None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, not {fsync!r}")
+        self.fsync = fsync
+        self.maxsize = maxsize
+        self.latency = latency
+        self.catalog = catalog
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._closed = False
+
+        self.written = 0
+        self.failed = 0
+        self.last_write_time = 0.0
+
+    @property
+    def pending(self):
+        return self._queue.unfinished_tasks
+
+    @property
+    def busy(self):
+        return self.pending >= max(1, self.maxsize - 2)
+
+    def start(self):
+        if self._thread is None:
+            # Daemon, or the interpreter would wait for it before running atexit and never get to close()
+            self._thread = Thread(target=self._run, name="image-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        return self
+
+    def submit(self, path, image, params=None, record=None):
+        """Queue image for writing to path, the caller must not modify image afterwards.
+
+        record is the file's catalog entry (see catalog.Catalog.add), if any.
+        """
+        if self._closed:
+            raise RuntimeError("ImageWriter is closed")
+        self._queue.put((path, image, params or [], time.perf_counter(), record))
+
+    def close(self):
+        """Write out everything still queued and stop the thread."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    # The sentinel sits behind the last saves, so the queue was never empty after them
+                    if self.catalog is not None:
+                        self._commit()
+                    return
+                self._write(*item)
+                if self.catalog is not None and self._queue.empty():
+                    self._commit()
+            finally:
+                self._queue.task_done()
+
+    def _commit(self):
+        try:
+            self.catalog.commit()
+        except sqlite3.Error as e:
+            print(f"Error: Could not update the catalog: {e}")
+
+    def _write(self, path, image, params, submitted, record):
+        start = time.perf_counter()
+        try:
+            ok, encoded = cv2.imencode(os.path.splitext(path)[1], image, params)
+            if not ok:
+                raise ValueError("encoding failed")
+            write_atomic(path, encoded, self.fsync)
+        except (OSError, ValueError, cv2.error) as e:
+            self.failed += 1
+            print(f"Error: Could not save {path}: {e}")
+            return
+        self.written += 1
+        self.last_write_time = time.perf_counter() - start
+        if self.latency is not None:
+            self.latency.observe(time.perf_counter() - submitted)
+        if self.catalog is not None and record is not None:
+            try:
+                self.catalog.add(path, record, encoded.size, hashlib.sha1(encoded).hexdigest(),
+                                 queue_seconds=start - submitted, write_seconds=self.last_write_time)
+            except sqlite3.Error as e:
+                print(f"Error: Could not add {path} to the catalog: {e}")
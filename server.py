@@ -1,11 +1,35 @@
-from flask import Flask, request, render_template, redirect, url_for, session
+from flask import Flask, request, render_template, redirect, url_for, session, Response, send_file, abort
+import math
 import os
+import sys
+import tempfile
+import time
+from threading import Lock
+
+import cv2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "photo_project"))
+import config
+from border_ingest import ingest
+from frame_bus import FrameBus
+from gallery import Gallery
+from metrics import read_published
 
 app = Flask(__name__)
 app.secret_key = "your_secret_key"  # Required for session management
 
 UPLOAD_FOLDER = "photo_project"
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
+# Requests that say they are bigger are refused before anything is read, the rest is checked while streaming
+app.config["MAX_CONTENT_LENGTH"] = config.UPLOAD_MAX_BYTES + 64 * 1024
+
+# One border install at a time, they share the staging files
+ingest_lock = Lock()
+
+# What the kiosk saved, browsable and downloadable without SSH
+PHOTO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "photo_project")
+gallery = Gallery({"merge": os.path.join(PHOTO_DIR, config.MERGE_DIR), "captures": os.path.join(PHOTO_DIR, config.CAPTURE_DIR)},
+                  os.path.join(PHOTO_DIR, config.GALLERY_CACHE_DIR))
 
 # Ensure the uploads folder exists
 if not os.path.exists(UPLOAD_FOLDER):
@@ -52,10 +76,127 @@ def upload():
     if file.filename == "":
         return "No selected file"
 
-    if file:
-        save_path = os.path.join(app.config["UPLOAD_FOLDER"], "frame4.png")
-        file.save(save_path)
-        return "File uploaded successfully as frame4.png"
+    # Stream to a temp file next to the borders, the kiosk only ever sees the finished renditions
+    fd, tmp_path = tempfile.mkstemp(suffix=".upload", dir=app.config["UPLOAD_FOLDER"])
+    try:
+        size = 0
+        with os.fdopen(fd, "wb") as tmp:
+            while True:
+                chunk = file.stream.read(64 * 1024)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > config.UPLOAD_MAX_BYTES:
+                    return f"File too large, the limit is {config.UPLOAD_MAX_BYTES // (1024 * 1024)} MB", 413
+                tmp.write(chunk)
+        with ingest_lock:
+            width, height = ingest(tmp_path, os.path.join(app.config["UPLOAD_FOLDER"], "frame4.png"))
+    except ValueError as e:
+        return f"Upload rejected: {e}", 400
+    finally:
+        os.remove(tmp_path)
+    return f"File uploaded successfully as frame4.png ({width}x{height}, rendered for the kiosk)"
+
+@app.route("/metrics")
+def metrics():
+    """Kiosk metrics in Prometheus text format, as last published by the kiosk (see photo_project/metrics.py)"""
+    return Response(read_published(config.METRICS_PATH), mimetype="text/plain; version=0.0.4")
+
+@app.route("/gallery")
+@app.route("/gallery/<album>")
+def gallery_page(album="merge"):
+    """One page of an album, newest first"""
+    if "user" not in session:
+        return redirect(url_for("login"))
+    if album not in gallery.albums:
+        abort(404)
+    page = request.args.get("page", 1, type=int)
+    names, pages = gallery.page(album, page, config.GALLERY_PAGE_SIZE)
+    return render_template("gallery.html", album=album, albums=sorted(gallery.albums), names=names,
+                           page=min(max(page, 1), pages), pages=pages)
+
+@app.route("/photo/<album>/<name>")
+@app.route("/photo/<album>/<name>/<size>")
+def photo(album, name, size=None):
+    """The original (?download=1 to save it) or a cached thumb/web copy, with ETag and Range support"""
+    if "user" not in session:
+        return redirect(url_for("login"))
+    path = gallery.path(album, name)
+    if path is None or (size is not None and size not in gallery.sizes):
+        abort(404)
+    try:
+        if size is None:
+            return send_file(path, as_attachment=bool(request.args.get("download")), download_name=name,
+                             etag=gallery.content_hash(path), conditional=True, max_age=3600)
+        target, etag = gallery.derivative(path, size)
+    except ValueError:
+        abort(404)
+    # Same content hash, same bytes: the browser may keep these for good
+    return send_file(target, mimetype="image/jpeg", etag=etag, conditional=True, max_age=30 * 24 * 3600)
+
+# Live view from the kiosk, attached on first use. Every viewer gets the same JPEG per frame,
+# so a frame is encoded once however many are watching
+stream_lock = Lock()
+stream_bus = None
+stream_jpeg = (0, b"")
+stream_last_new = 0.0
+
+def latest_jpeg(last_seq):
+    """(seq, JPEG) of the kiosk's newest frame after last_seq, or None. Raises FileNotFoundError if the kiosk isn't running."""
+    global stream_bus, stream_jpeg, stream_last_new
+    with stream_lock:
+        if stream_bus is None:
+            stream_bus = FrameBus(config.FRAME_BUS_NAME)
+            stream_last_new = time.monotonic()
+        stream_bus.heartbeat()
+        if stream_jpeg[0] and stream_jpeg[0] != last_seq:
+            return stream_jpeg
+        latest = stream_bus.latest(stream_jpeg[0])
+        if latest is None:
+            if time.monotonic() - stream_last_new > 5:
+                # Kiosk asleep or restarted with a new block, attach again
+                stream_bus.close()
+                stream_bus = None
+            return None
+        stream_last_new = time.monotonic()
+        seq, _, frame = latest
+        ok, data = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, config.STREAM_QUALITY])
+        if not ok:
+            return None
+        stream_jpeg = (seq, data.tobytes())
+        return stream_jpeg
+
+@app.route("/stream")
+def stream():
+    """MJPEG of the kiosk's screen, ?fps= up to config.STREAM_MAX_FPS"""
+    if "user" not in session:
+        return redirect(url_for("login"))
+    if not config.FRAME_BUS_NAME:
+        abort(404)
+    fps = request.args.get("fps", config.STREAM_MAX_FPS, type=float)
+    if not math.isfinite(fps):
+        # min() and max() let nan through, and a nan period would never sleep
+        fps = config.STREAM_MAX_FPS
+    fps = min(max(fps, 0.5), config.STREAM_MAX_FPS)
+    try:
+        first = latest_jpeg(0)
+    except (FileNotFoundError, ValueError):
+        return "The kiosk is not running", 503
+
+    def frames(jpeg):
+        seq = 0
+        while True:
+            start = time.monotonic()
+            if jpeg is not None:
+                seq, data = jpeg
+                yield b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: " + str(len(data)).encode() + b"\r\n\r\n" + data + b"\r\n"
+            time.sleep(max(0.0, 1.0 / fps - (time.monotonic() - start)))
+            try:
+                jpeg = latest_jpeg(seq)
+            except (FileNotFoundError, ValueError):
+                return
+
+    return Response(frames(first), mimetype="multipart/x-mixed-replace; boundary=frame")
 
 @app.route("/logout")
 def logout():